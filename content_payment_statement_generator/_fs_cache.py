@@ -0,0 +1,44 @@
+"""
+ファイルシステム情報キャッシュモジュール
+
+設定ファイル・入力ディレクトリなど、処理中に変化しないパスのstat結果をキャッシュします。
+処理中に作成・更新される出力ファイルには使用しないでください。
+"""
+
+import os
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+
+# stat呼び出しを並行させるスレッド数（ネットワークドライブの待ち時間を重ねるため）
+_STAT_WORKERS = 8
+
+
+@functools.lru_cache(maxsize=512)
+def path_stat(path: str) -> Optional[os.stat_result]:
+    """パスのstat結果を取得（存在しない・アクセスできない場合はNone）"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def path_exists(path: str) -> bool:
+    """パスの存在確認（キャッシュ済みのstat結果を使用）"""
+    return path_stat(str(path)) is not None
+
+
+def stat_paths(paths: Iterable[str]) -> List[Optional[os.stat_result]]:
+    """複数パスのstat結果をまとめて取得（未キャッシュのパスは並行してstatする）"""
+    paths = [str(path) for path in paths]
+    if len(paths) <= 1:
+        return [path_stat(path) for path in paths]
+
+    with ThreadPoolExecutor(max_workers=min(_STAT_WORKERS, len(paths))) as executor:
+        return list(executor.map(path_stat, paths))
+
+
+def clear_stat_cache() -> None:
+    """キャッシュしたstat結果を破棄"""
+    path_stat.cache_clear()
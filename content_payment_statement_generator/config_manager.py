@@ -11,6 +11,8 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from ._fs_cache import path_exists, stat_paths
+
 # 後方互換性のためのラッパークラス
 class ConfigManager(UnifiedConfigManager):
     """content_payment_statement_generator用ConfigManagerラッパー（非推奨）"""
@@ -52,8 +54,9 @@ class ConfigManager(UnifiedConfigManager):
         
     def _validate_paths(self) -> None:
         """設定されたパスの存在確認"""
-        for path_name, path_value in self.base_paths.items():
-            if not Path(path_value).exists():
+        # 全パスをまとめて確認（結果はキャッシュされ、以降の存在確認で再利用される）
+        for (path_name, path_value), stat in zip(self.base_paths.items(), stat_paths(self.base_paths.values())):
+            if stat is None:
                 logging.warning(f"設定されたパス '{path_name}' が存在しません: {path_value}")
     
     def get_monthly_sales_file(self) -> str:
@@ -79,7 +82,7 @@ class ConfigManager(UnifiedConfigManager):
     def get_template_files(self) -> List[str]:
         """テンプレートファイルのリストを取得"""
         template_dir = Path(self.base_paths['template_dir'])
-        if not template_dir.exists():
+        if not path_exists(template_dir):
             logging.error(f"テンプレートディレクトリが存在しません: {template_dir}")
             return []
         
@@ -96,15 +99,15 @@ class ConfigManager(UnifiedConfigManager):
         """テンプレート名からファイルパスを取得"""
         template_dir = Path(self.base_paths['template_dir'])
         
-        # 完全一致を試行
+        # 完全一致を試行（テンプレートは処理中に変化しないため存在確認の結果はキャッシュを使用）
         exact_match = template_dir / template_name
-        if exact_match.exists():
+        if path_exists(exact_match):
             return str(exact_match)
         
         # 拡張子を追加して試行
         for ext in ['.xlsx', '.xls']:
             with_ext = template_dir / f"{template_name}{ext}"
-            if with_ext.exists():
+            if path_exists(with_ext):
                 return str(with_ext)
         
         logging.warning(f"テンプレートファイルが見つかりません: {template_name}")
@@ -112,29 +115,18 @@ class ConfigManager(UnifiedConfigManager):
     
     def validate_required_files(self, year: str, month: str) -> Dict[str, bool]:
         """必要なファイルの存在確認"""
-        validation_results = {}
-        
-        # 月別売上ファイル
-        monthly_sales_path = self.get_monthly_sales_file()
-        validation_results['monthly_sales'] = Path(monthly_sales_path).exists()
-        
-        # LINEコンテンツファイル（オプション）
-        line_contents_path = self.get_line_contents_file(year, month)
-        line_contents_exists = Path(line_contents_path).exists()
-        validation_results['line_contents'] = line_contents_exists
-        if not line_contents_exists:
-            logging.warning(f"LINEコンテンツファイルが見つかりません（オプション）: {line_contents_path}")
-        
-        # マッピングファイル
-        mapping_path = self.get_contents_mapping_file()
-        validation_results['contents_mapping'] = Path(mapping_path).exists()
-        
-        # レートファイル
-        rate_path = self.get_rate_data_file()
-        validation_results['rate_data'] = Path(rate_path).exists()
+        # 確認対象のパスを集めてまとめてstatする
+        required_paths = {
+            'monthly_sales': self.get_monthly_sales_file(),                 # 月別売上ファイル
+            'line_contents': self.get_line_contents_file(year, month),      # LINEコンテンツファイル（オプション）
+            'contents_mapping': self.get_contents_mapping_file(),           # マッピングファイル
+            'rate_data': self.get_rate_data_file(),                         # レートファイル
+            'template_dir': self.base_paths['template_dir']                 # テンプレートディレクトリ
+        }
+        stats = stat_paths(required_paths.values())
+        validation_results = {file_type: stat is not None for file_type, stat in zip(required_paths, stats)}
         
-        # テンプレートディレクトリ
-        template_dir = Path(self.base_paths['template_dir'])
-        validation_results['template_dir'] = template_dir.exists()
+        if not validation_results['line_contents']:
+            logging.warning(f"LINEコンテンツファイルが見つかりません（オプション）: {required_paths['line_contents']}")
         
         return validation_results
\ No newline at end of file
@@ -9,7 +9,7 @@ from datetime import datetime
 from typing import List, Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SalesRecord:
     """売上レコードデータクラス"""
     platform: str
@@ -23,7 +23,7 @@ class SalesRecord:
     sales_count: int = 0  # 売上件数（ameba、mediba、rakutenのみ）
 
 
-@dataclass
+@dataclass(slots=True)
 class PaymentStatement:
     """支払い明細書データクラス"""
     content_name: str
@@ -32,4 +32,4 @@ class PaymentStatement:
     total_performance: float
     total_information_fee: float
     payment_date: datetime
-    recipient_email: str
\ No newline at end of file
+    recipient_email: str
@@ -5,8 +5,12 @@ Gmail APIを使用したメール送信と予約機能を提供します。
 """
 
 import os
+import io
+import re
 import base64
 import csv
+import functools
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
@@ -27,6 +31,43 @@ except ImportError:
     logging.warning("Google API libraries not available. Email functionality will be limited.")
 
 
+# 基本的なメールアドレス形式の正規表現
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# 支払い通知メール本文のテンプレート（宛名と年月のみ差し替え）
+_BODY_TEMPLATE = """{greeting}お世話になっております。アウトワード溝口です。
+
+{formatted_month}のロイヤリティ明細書をお送りいたします。
+
+今回のロイヤリティにつきましては、10,000円未満のため、誠に恐縮ながら次回分と合算してのお振込みとさせていただきます。何卒ご了承いただけますようお願い申し上げます。
+
+お振込みやロイヤリティに関して、ご不明な点やご不備などがございましたら、ご遠慮なくご連絡ください。
+
+今後ともどうぞよろしくお願い申し上げます。
+
+
+---
+────────────────────────────────
+溝口　洋輔
+
+MAIL: mizoguchi@outward.jp
+
+株式会社アウトワード
+
+本社／福岡市西区福重3-36-6　〒819-0022
+TEL：092-885-1364　FAX：092-885-1459
+URL: http://www.outward.jp
+────────────────────────────────
+"""
+
+
+@functools.lru_cache(maxsize=4096)
+def _compose_subject(target_month: str, content_name: str) -> str:
+    """年月とコンテンツ名から支払い通知メールの件名を組み立て"""
+    base_subject = f"{target_month[:4]}年{int(target_month[4:])}月お支払いのご連絡"
+    return f"{base_subject}【{content_name}】" if content_name else base_subject
+
+
 class EmailProcessor:
     """メール送信処理クラス"""
     
@@ -37,6 +78,11 @@ class EmailProcessor:
         'https://www.googleapis.com/auth/gmail.modify'
     ]
     
+    # 一時的なエラーとして再試行するHTTPステータス
+    RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+    MAX_RETRY_ATTEMPTS = 5
+    MAX_RETRY_WAIT = 16
+    
     def __init__(self, credentials_path: str = 'credentials.json', token_path: str = 'token.json'):
         """メール送信処理クラスを初期化"""
         self.logger = logging.getLogger(__name__)
@@ -44,6 +90,7 @@ class EmailProcessor:
         self.token_path = token_path
         self.gmail_service = None
         self.contents_mapping = {}
+        self._subject_name_cache: Dict[str, str] = {}
         
         # コンテンツマッピングを読み込み
         self._load_contents_mapping()
@@ -56,6 +103,23 @@ class EmailProcessor:
         else:
             self.logger.warning("Google API libraries not available")
     
+    def __enter__(self) -> 'EmailProcessor':
+        """一括処理の開始（Gmail APIサービスが未初期化なら再度初期化を試みる）"""
+        if self.gmail_service is None and GOOGLE_APIS_AVAILABLE:
+            self.gmail_service = self._setup_gmail_service()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Gmail APIの接続を閉じる（サービスは保持し、次回の呼び出し時に再接続される）"""
+        if self.gmail_service is not None:
+            try:
+                self.gmail_service.close()
+            except Exception as e:
+                self.logger.warning(f"Gmail API接続の終了エラー: {e}")
+    
     def _load_contents_mapping(self) -> None:
         """contents_mapping.csvからコンテンツマッピングを読み込み"""
         try:
@@ -64,26 +128,29 @@ class EmailProcessor:
                 self.logger.warning(f"contents_mapping.csvが見つかりません: {csv_path}")
                 return
             
-            with open(csv_path, 'r', encoding='utf-8-sig') as f:
-                reader = csv.reader(f)
-                headers = next(reader)
-                
-                for row in reader:
-                    if len(row) >= 7:  # 最低7列必要（A-G列）
-                        content_id = row[0]  # A列
-                        mediba_name = row[3]  # D列
-                        ameba_name = row[5]   # F列
-                        rakuten_name = row[6] # G列
-                        
-                        self.contents_mapping[content_id] = {
-                            'mediba': mediba_name,
-                            'ameba': ameba_name,
-                            'rakuten': rakuten_name
-                        }
-                        
-                        # デバッグ用ログ（最初の5件のみ）
-                        if len(self.contents_mapping) <= 5:
-                            self.logger.debug(f"コンテンツID '{content_id}': mediba='{mediba_name}', ameba='{ameba_name}', rakuten='{rakuten_name}'")
+            # ファイル全体を一度に読み込んでからメモリ上で解析
+            with open(csv_path, 'rb') as f:
+                data = f.read()
+            
+            reader = csv.reader(io.StringIO(data.decode('utf-8-sig')))
+            next(reader, None)  # ヘッダー行
+            
+            for row in reader:
+                if len(row) >= 7:  # 最低7列必要（A-G列）
+                    content_id = row[0]  # A列
+                    mediba_name = row[3]  # D列
+                    ameba_name = row[5]   # F列
+                    rakuten_name = row[6] # G列
+                    
+                    self.contents_mapping[content_id] = {
+                        'mediba': mediba_name,
+                        'ameba': ameba_name,
+                        'rakuten': rakuten_name
+                    }
+                    
+                    # デバッグ用ログ（最初の5件のみ）
+                    if len(self.contents_mapping) <= 5:
+                        self.logger.debug(f"コンテンツID '{content_id}': mediba='{mediba_name}', ameba='{ameba_name}', rakuten='{rakuten_name}'")
             
             self.logger.info(f"コンテンツマッピングを読み込みました: {len(self.contents_mapping)}件")
             
@@ -149,7 +216,9 @@ class EmailProcessor:
                     token.write(creds.to_json())
             
             # Gmail APIサービスを構築
-            service = build('gmail', 'v1', credentials=creds)
+            # ディスカバリー文書はライブラリ同梱のものを使い、ファイルキャッシュは使わない
+            # （構築したサービスとそのHTTP接続は全リクエストで使い回す）
+            service = build('gmail', 'v1', credentials=creds, cache_discovery=False)
             self.logger.info("Gmail APIサービスが正常に初期化されました")
             return service
             
@@ -226,10 +295,12 @@ class EmailProcessor:
             }
             
             self.logger.debug("Gmail APIに下書き作成リクエストを送信中...")
-            result = self.gmail_service.users().drafts().create(
-                userId='me',
-                body=draft_request
-            ).execute()
+            result = self._execute_with_retry(
+                self.gmail_service.users().drafts().create(
+                    userId='me',
+                    body=draft_request
+                )
+            )
             
             draft_id = result.get('id', 'Unknown')
             self.logger.info(f"下書き作成完了: Draft ID {draft_id}")
@@ -249,6 +320,24 @@ class EmailProcessor:
             self.logger.error(f"トレースバック: {traceback.format_exc()}")
             return False
 
+    def _execute_with_retry(self, request: Any) -> Dict[str, Any]:
+        """Gmail APIリクエストを実行（429/5xxは指数バックオフで再試行）"""
+        for attempt in range(1, self.MAX_RETRY_ATTEMPTS + 1):
+            try:
+                return request.execute()
+            except HttpError as error:
+                status = getattr(getattr(error, 'resp', None), 'status', None)
+                if status not in self.RETRYABLE_STATUSES or attempt == self.MAX_RETRY_ATTEMPTS:
+                    raise
+                
+                wait = min(2 ** (attempt - 1), self.MAX_RETRY_WAIT)
+                retry_after = error.resp.get('retry-after') if hasattr(error.resp, 'get') else None
+                if retry_after and str(retry_after).isdigit():
+                    wait = max(wait, int(retry_after))
+                
+                self.logger.warning(f"Gmail API 一時エラー (HTTP {status})。{wait}秒後に再試行します ({attempt}/{self.MAX_RETRY_ATTEMPTS})")
+                time.sleep(wait)
+
     def send_message(self, message: Dict[str, str]) -> bool:
         """メールメッセージを送信"""
         try:
@@ -377,30 +466,18 @@ class EmailProcessor:
     def _create_payment_notification_subject(self, target_month: str, addressee_name: str = "", content_id: str = "") -> str:
         """支払い通知メールの件名を作成"""
         try:
-            # 年月を表示用にフォーマット
-            year = target_month[:4]
-            month = target_month[4:]
-            
-            # 基本の件名
-            base_subject = f"{year}年{int(month)}月お支払いのご連絡"
-            
-            # コンテンツ名を取得
-            content_name_for_subject = ""
-            if content_id and content_id.strip():
-                content_name_for_subject = self._get_content_name_for_subject(content_id.strip())
-                self.logger.info(f"コンテンツID '{content_id}' からコンテンツ名 '{content_name_for_subject}' を取得")
-            else:
+            content_id = content_id.strip() if content_id else ""
+            if not content_id:
                 self.logger.warning(f"コンテンツIDが空またはNone: '{content_id}'")
+                return _compose_subject(target_month, "")
             
-            # 件名にコンテンツ名を追加
-            if content_name_for_subject:
-                subject = f"{base_subject}【{content_name_for_subject}】"
-                self.logger.info(f"件名にコンテンツ名を追加: {subject}")
-            else:
-                subject = base_subject
-                self.logger.info(f"コンテンツ名なしの件名: {subject}")
+            # コンテンツ名はコンテンツIDごとに一度だけ解決する
+            content_name_for_subject = self._subject_name_cache.get(content_id)
+            if content_name_for_subject is None:
+                content_name_for_subject = self._get_content_name_for_subject(content_id)
+                self._subject_name_cache[content_id] = content_name_for_subject
             
-            return subject
+            return _compose_subject(target_month, content_name_for_subject)
             
         except Exception as e:
             self.logger.error(f"メール件名作成エラー: {e}")
@@ -419,32 +496,7 @@ class EmailProcessor:
             if greeting:
                 greeting += "\n\n"
             
-            body = f"""{greeting}お世話になっております。アウトワード溝口です。
-
-{formatted_month}のロイヤリティ明細書をお送りいたします。
-
-今回のロイヤリティにつきましては、10,000円未満のため、誠に恐縮ながら次回分と合算してのお振込みとさせていただきます。何卒ご了承いただけますようお願い申し上げます。
-
-お振込みやロイヤリティに関して、ご不明な点やご不備などがございましたら、ご遠慮なくご連絡ください。
-
-今後ともどうぞよろしくお願い申し上げます。
-
-
----
-────────────────────────────────
-溝口　洋輔
-
-MAIL: mizoguchi@outward.jp
-
-株式会社アウトワード
-
-本社／福岡市西区福重3-36-6　〒819-0022
-TEL：092-885-1364　FAX：092-885-1459
-URL: http://www.outward.jp
-────────────────────────────────
-"""
-            
-            return body
+            return _BODY_TEMPLATE.format(greeting=greeting, formatted_month=formatted_month)
             
         except Exception as e:
             self.logger.error(f"メール本文作成エラー: {e}")
@@ -476,12 +528,7 @@ URL: http://www.outward.jp
     def validate_email_address(self, email: str) -> bool:
         """メールアドレスの形式を検証"""
         try:
-            import re
-            
-            # 基本的なメールアドレス形式の正規表現
-            pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            
-            if re.match(pattern, email):
+            if _EMAIL_RE.match(email):
                 return True
             else:
                 self.logger.warning(f"無効なメールアドレス形式: {email}")
@@ -4,33 +4,75 @@ Excelファイル処理モジュール
 Excelテンプレートの複製と明細データの書き込みを行います。
 """
 
+import re
 import shutil
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
 import openpyxl
+from openpyxl import LXML
+from openpyxl.cell.cell import MergedCell
+from openpyxl.utils import get_column_letter
 from openpyxl.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 from .config_manager import ConfigManager
 from .data_models import SalesRecord
+from ._fs_cache import path_exists
+
+
+if not LXML:
+    logging.warning("lxml not available. openpyxl will fall back to the slower ElementTree parser.")
+
+# 支払日を前月末日とするテンプレート（テンプレート名に含まれていれば対象）
+_PREVMONTH_TEMPLATES = frozenset(['epc', 'gaia', 'ichild', 'macalon', 'mermaid', 'shape', 'shintaku'])
+_PREVMONTH_RE = re.compile('|'.join(sorted(map(re.escape, _PREVMONTH_TEMPLATES))))
+
+# W列に件数を記入するプラットフォーム
+_COUNT_PLATFORMS = frozenset(['ameba', 'mediba', 'rakuten'])
+
+
+def _parse_target_month(target_month: str) -> Tuple[int, int]:
+    """YYYYMM形式の対象年月を(年, 月)に変換"""
+    return divmod(int(target_month), 100)
 
 
 class ExcelProcessor:
     """Excelファイル処理クラス"""
     
+    # テンプレートの外部リンクと数式は保持したまま読み込む（保存した明細書からリンクが消えないようにする）
+    LOAD_OPTIONS = {'keep_links': True, 'data_only': False}
+    
+    # 明細行で書き込む列の列番号（セル座標文字列の解析を避けるため列番号で指定する）
+    COL_A = 1    # 支払日
+    COL_D = 4    # プラットフォーム名
+    COL_G = 7    # コンテンツ名
+    COL_M = 13   # 対象年月
+    COL_S = 19   # 実績額
+    COL_W = 23   # 件数
+    COL_Y = 25   # 情報提供料額
+    COL_AC = 29  # 料率
+    
     def __init__(self, config_manager: ConfigManager):
         """Excel処理クラスを初期化"""
         self.config = config_manager
         self.logger = logging.getLogger(__name__)
+        # マージセル（左上以外）の座標 -> 左上セル座標（書き込み対象シートごとに再構築）
+        self._merge_map: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        # テンプレートパス -> ファイル内容
+        self._template_cache: Dict[str, bytes] = {}
+        # YYYYMM -> YYYY年MM月 の変換結果
+        self._display_month_cache: Dict[str, str] = {}
+        # DEBUGログ出力の有無（明細書き込みごとに更新）
+        self._debug = self.logger.isEnabledFor(logging.DEBUG)
     
-    def copy_template(self, template_name: str, output_path: str, target_month: str, content_name: str = None) -> str:
-        """テンプレートファイルを指定の出力パスに複製"""
+    def copy_template(self, template_name: str, output_path: str, target_month: str, content_name: str = None, output_suffix: str = None) -> str:
+        """テンプレートファイルを指定の出力パスに複製（output_suffixはファイル名の末尾に付加）"""
         try:
             # テンプレートファイルのパスを取得
             template_path = self.config.get_template_file_by_name(template_name)
             
-            if not template_path or not Path(template_path).exists():
+            if not template_path or not path_exists(template_path):
                 raise FileNotFoundError(f"テンプレートファイルが見つかりません: {template_name}")
             
             # 出力ファイル名を生成
@@ -42,13 +84,21 @@ class ExcelProcessor:
                 # コンテンツ名が指定されていない場合: 元ファイル名_YYYYMM.xlsx
                 base_name = template_file.stem  # 拡張子を除いたファイル名
                 output_filename = f"{base_name}_{target_month}.xlsx"
+            if output_suffix:
+                # 同じファイル名になる明細書が複数ある場合: ..._YYYYMM_suffix.xlsx
+                output_filename = f"{Path(output_filename).stem}_{output_suffix}.xlsx"
             output_file_path = Path(output_path) / output_filename
             
             # ディレクトリを作成
             output_file_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # ファイルを複製
-            shutil.copy2(template_path, output_file_path)
+            # ファイルを複製（テンプレートの内容はメモリに保持して再読み込みを避ける）
+            template_bytes = self._template_cache.get(template_path)
+            if template_bytes is None:
+                template_bytes = Path(template_path).read_bytes()
+                self._template_cache[template_path] = template_bytes
+            output_file_path.write_bytes(template_bytes)
+            shutil.copystat(template_path, output_file_path)
             
             self.logger.info(f"テンプレートファイルを複製しました: {output_file_path}")
             return str(output_file_path)
@@ -57,262 +107,231 @@ class ExcelProcessor:
             self.logger.error(f"テンプレートファイル複製エラー: {e}")
             raise
     
+    def _open(self, workbook_path: str) -> Tuple[Workbook, Worksheet]:
+        """Excelファイルを開き、ワークブックとアクティブシートを返す"""
+        workbook = openpyxl.load_workbook(workbook_path, **self.LOAD_OPTIONS)
+        return workbook, workbook.active
+    
     def write_payment_date(self, workbook_path: str, target_month: str, template_name: str) -> None:
         """S3セルに適切な日付を記入"""
+        workbook = None
         try:
             # Excelファイルを開く
-            workbook = openpyxl.load_workbook(workbook_path)
-            worksheet = workbook.active
+            workbook, worksheet = self._open(workbook_path)
             
-            # 対象年月を解析
-            year = int(target_month[:4])
-            month = int(target_month[4:])
-            
-            # テンプレート名から判定してS3セルに記入する日付を決定
-            template_lower = template_name.lower()
-            target_templates = ['epc', 'gaia', 'ichild', 'macalon', 'mermaid', 'shape', 'shintaku']
-            
-            if any(template in template_lower for template in target_templates):
-                # 前月末日を計算
-                if month == 1:
-                    prev_year = year - 1
-                    prev_month = 12
-                else:
-                    prev_year = year
-                    prev_month = month - 1
-                
-                # 前月末日を取得
-                if prev_month in [1, 3, 5, 7, 8, 10, 12]:
-                    last_day = 31
-                elif prev_month in [4, 6, 9, 11]:
-                    last_day = 30
-                else:  # 2月
-                    # うるう年判定
-                    if (prev_year % 4 == 0 and prev_year % 100 != 0) or (prev_year % 400 == 0):
-                        last_day = 29
-                    else:
-                        last_day = 28
-                
-                date_to_write = datetime(prev_year, prev_month, last_day)
-                self.logger.info(f"対象テンプレート {template_name}: S3セルに前月末日を記入: {date_to_write.strftime('%Y年%m月%d日')}")
-            else:
-                # その他のテンプレートは従来通り対象年月の5日
-                date_to_write = datetime(year, month, 5)
-                self.logger.info(f"通常テンプレート {template_name}: S3セルに5日を記入: {date_to_write.strftime('%Y年%m月%d日')}")
-            
-            # S3セルに日付を設定（yyyy年m月d日フォーマット）
-            formatted_date = date_to_write.strftime('%Y年%m月%d日')
-            worksheet['S3'] = formatted_date
+            self._write_payment_date(worksheet, self._payment_date(_parse_target_month(target_month), template_name))
             
             # ファイルを保存
             workbook.save(workbook_path)
             
-            self.logger.info(f"日付を設定しました: S3セル = {formatted_date}")
-            
         except Exception as e:
             self.logger.error(f"日付設定エラー: {e}")
             raise
         finally:
-            if 'workbook' in locals():
+            if workbook is not None:
                 workbook.close()
     
+    def _write_payment_date(self, worksheet: Worksheet, payment_date: datetime) -> None:
+        """読み込み済みシートのS3セルに支払日を記入"""
+        # S3セルに日付を設定（yyyy年m月d日フォーマット）
+        formatted_date = payment_date.strftime('%Y年%m月%d日')
+        worksheet['S3'] = formatted_date
+        
+        self.logger.info(f"日付を設定しました: S3セル = {formatted_date}")
+    
+    def _payment_date(self, year_month: Tuple[int, int], template_name: str = None) -> datetime:
+        """対象年月（年, 月）とテンプレート名から支払日を決定（S3セル・A列で共通）"""
+        year, month = year_month
+        
+        # テンプレート名から判定
+        if template_name and _PREVMONTH_RE.search(template_name.lower()):
+            # 前月末日を計算
+            payment_date = self._previous_month_end(year, month)
+            self.logger.info(f"対象テンプレート {template_name}: 支払日は前月末日: {payment_date.strftime('%Y年%m月%d日')}")
+        else:
+            # その他のテンプレートは従来通り対象年月の5日
+            payment_date = datetime(year, month, 5)
+            self.logger.info(f"通常テンプレート {template_name}: 支払日は5日: {payment_date.strftime('%Y年%m月%d日')}")
+        
+        return payment_date
+    
     def write_statement_details(self, workbook_path: str, sales_records: List[SalesRecord], processing_month: str, template_name: str = None) -> None:
         """23行目以降に明細データを書き込み"""
+        workbook = None
         try:
             # Excelファイルを開く
-            workbook = openpyxl.load_workbook(workbook_path)
-            worksheet = workbook.active
-            
-            # W21セルが「件数」かチェック
-            w21_cell = worksheet['W21']
-            has_count_column = (w21_cell.value and str(w21_cell.value).strip() == '件数')
+            workbook, worksheet = self._open(workbook_path)
             
-            self.logger.info(f"W21セルの値: '{w21_cell.value}', 件数列有効: {has_count_column}")
-            
-            # 開始行（23行目）
-            start_row = 23
-            
-            for i, record in enumerate(sales_records):
-                row_num = start_row + i
-                
-                # 各列にデータを設定
-                self._write_record_to_row(worksheet, row_num, record, processing_month, has_count_column, template_name)
+            payment_date = self._payment_date(_parse_target_month(processing_month), template_name)
+            self._write_statement_details(worksheet, sales_records, payment_date)
             
             # ファイルを保存
             workbook.save(workbook_path)
             
-            self.logger.info(f"明細データを書き込みました: {len(sales_records)}件")
-            
         except Exception as e:
             self.logger.error(f"明細データ書き込みエラー: {e}")
             raise
         finally:
-            if 'workbook' in locals():
+            if workbook is not None:
                 workbook.close()
     
-    def _write_record_to_row(self, worksheet: Worksheet, row_num: int, record: SalesRecord, processing_month: str, has_count_column: bool = False, template_name: str = None) -> None:
-        """1つのSalesRecordを指定行に書き込み"""
-        try:
-            # 要求仕様に基づく新しいルール:
-            # A列：処理開始時に指定した年月（m月d日形式）
-            # D列：プラットフォーム名  
-            # G列：コンテンツ名
-            # M列：target_month.csvのC列の数値分、対象年月からマイナスした年月
-            # S列：該当年月の「実績」額
-            # Y列：該当年月の「情報提供料」額
-            # W列：件数（W21セルが「件数」の場合のみ、ameba、mediba、rakutenのみ対象）
-            
-            # processing_monthをm月d日形式に変換（テンプレート名を考慮）
-            formatted_payment_date = self._format_payment_date(processing_month, template_name)
-            
-            # セルへの書き込み（マージセルの場合は上位セルに書き込む）
-            self._safe_write_cell(worksheet, f'A{row_num}', formatted_payment_date)  # A列：処理開始時に指定した年月（m月d日形式）
-            self._safe_write_cell(worksheet, f'D{row_num}', record.platform)       # D列：プラットフォーム名
-            self._safe_write_cell(worksheet, f'G{row_num}', record.content_name)   # G列：コンテンツ名
-            # M列：マイナスした年月 - デバッグ情報を追加
-            target_month_str = self._format_target_month_for_display(record.target_month)
-            self.logger.debug(f"M{row_num}列に対象年月を記入: raw={record.target_month}, formatted={target_month_str}")
-            self._safe_write_cell(worksheet, f'M{row_num}', target_month_str)   # M列：マイナスした年月
-            self._safe_write_cell(worksheet, f'S{row_num}', record.performance)    # S列：実績額
-            self._safe_write_cell(worksheet, f'Y{row_num}', record.information_fee) # Y列：情報提供料額
-            
-            # W列：件数（条件に合致する場合のみ）
-            if has_count_column and record.platform.lower() in ['ameba', 'mediba', 'rakuten'] and record.sales_count > 0:
-                self._safe_write_cell(worksheet, f'W{row_num}', record.sales_count)
-                self.logger.debug(f"W{row_num}に件数を記入: {record.sales_count} ({record.platform})")
-            
-            # AC列（料率）は数式が存在する場合は保持し、なければ値を設定
-            self._write_rate_cell(worksheet, f'AC{row_num}', record.rate)
-            
-            self.logger.debug(f"行 {row_num} にレコードを書き込みました: {record.content_name}")
-            
-        except Exception as e:
-            self.logger.error(f"レコード書き込みエラー (行 {row_num}): {e}")
-            raise
+    def _write_statement_details(self, worksheet: Worksheet, sales_records: List[SalesRecord], payment_date: datetime) -> None:
+        """読み込み済みシートの23行目以降に明細データを書き込み"""
+        # 明細行はテンプレートの書式・マージセル・数式の上に書き込むため openpyxl で編集する
+        # （xlsxwriter / pyexcelerate は新規ファイルの作成専用で既存テンプレートを編集できない）
+        # W21セルが「件数」かチェック
+        w21_cell = worksheet['W21']
+        has_count_column = (w21_cell.value and str(w21_cell.value).strip() == '件数')
+        
+        self.logger.info(f"W21セルの値: '{w21_cell.value}', 件数列有効: {has_count_column}")
+        
+        self._debug = self.logger.isEnabledFor(logging.DEBUG)
+        
+        # マージ範囲を一度だけ走査して座標の対応表を作成
+        self._merge_map = self._build_merge_map(worksheet)
+        
+        # 支払日をm月d日形式に変換（全行共通のため一度だけ）
+        formatted_payment_date = f"{payment_date.month}月{payment_date.day}日"
+        
+        # 開始行（23行目）
+        start_row = 23
+        
+        for i, (row_values, rate) in enumerate(self._statement_rows(sales_records, formatted_payment_date, has_count_column)):
+            # 各列にデータを設定（書き込めない行は警告を出して次の行へ進む）
+            try:
+                self._write_record_to_row(worksheet, start_row + i, row_values, rate)
+            except Exception as e:
+                self.logger.warning(f"レコード書き込みエラー (行 {start_row + i}): {e}")
+        
+        self.logger.info(f"明細データを書き込みました: {len(sales_records)}件")
     
-    def _format_payment_date(self, processing_month: str, template_name: str = None) -> str:
-        """YYYYMM形式をm月d日形式に変換"""
-        try:
-            # processing_monthをYYYYMM形式と仮定
-            year = int(processing_month[:4])
-            month = int(processing_month[4:])
-            
-            # テンプレート名から判定
-            if template_name:
-                template_lower = template_name.lower()
-                target_templates = ['epc', 'gaia', 'ichild', 'macalon', 'mermaid', 'shape', 'shintaku']
-                
-                if any(template in template_lower for template in target_templates):
-                    # 前月末日を計算
-                    if month == 1:
-                        prev_year = year - 1
-                        prev_month = 12
-                    else:
-                        prev_year = year
-                        prev_month = month - 1
-                    
-                    # 前月末日を取得
-                    if prev_month in [1, 3, 5, 7, 8, 10, 12]:
-                        last_day = 31
-                    elif prev_month in [4, 6, 9, 11]:
-                        last_day = 30
-                    else:  # 2月
-                        # うるう年判定
-                        if (prev_year % 4 == 0 and prev_year % 100 != 0) or (prev_year % 400 == 0):
-                            last_day = 29
-                        else:
-                            last_day = 28
-                    
-                    # m月d日形式で返す（前月末日）
-                    return f"{prev_month}月{last_day}日"
-            
-            # デフォルトは5日とする（既存のロジックに合わせる）
-            day = 5
-            
-            # m月d日形式で返す
-            return f"{month}月{day}日"
-            
-        except Exception as e:
-            self.logger.error(f"支払日フォーマットエラー: {e}")
-            return processing_month  # エラー時は元の値を返す
+    def _write_record_to_row(self, worksheet: Worksheet, row_num: int, row_values: List[Tuple[int, object]], rate: float) -> None:
+        """1レコード分の（列番号, 値）と料率を指定行に書き込み"""
+        # セルへの書き込み（列番号で指定、マージセルの場合は上位セルに書き込む）
+        for column, value in row_values:
+            self._safe_write_cell(worksheet, row_num, column, value)
+        
+        # AC列（料率）は数式が存在する場合は保持し、なければ値を設定
+        self._write_rate_cell(worksheet, row_num, self.COL_AC, rate)
+        
+        if self._debug:
+            self.logger.debug("行 %d にレコードを書き込みました", row_num)
+    
+    def _statement_rows(self, sales_records: List[SalesRecord], formatted_payment_date: str, has_count_column: bool) -> List[Tuple[List[Tuple[int, object]], float]]:
+        """明細行ごとの料率以外の（列番号, 値）のリストと料率を作成"""
+        # 要求仕様に基づく新しいルール:
+        # A列：処理開始時に指定した年月（m月d日形式）
+        # D列：プラットフォーム名  
+        # G列：コンテンツ名
+        # M列：target_month.csvのC列の数値分、対象年月からマイナスした年月
+        # S列：該当年月の「実績」額
+        # Y列：該当年月の「情報提供料」額
+        # W列：件数（W21セルが「件数」の場合のみ、ameba、mediba、rakutenのみ対象）
+        
+        count_rows = 0
+        
+        rows = []
+        for record in sales_records:
+            # 文字列セルをまとめて書き込んでから数値セルを書き込む（列順は各グループ内で維持）
+            row_values = [
+                (self.COL_A, formatted_payment_date),   # A列：処理開始時に指定した年月（m月d日形式）
+                (self.COL_D, record.platform),          # D列：プラットフォーム名
+                (self.COL_G, record.content_name),      # G列：コンテンツ名
+                (self.COL_M, self._format_target_month_for_display(record.target_month)),  # M列：マイナスした年月
+                (self.COL_S, record.performance),       # S列：実績額
+            ]
+            
+            # W列：件数（W21セルが「件数」で、対象プラットフォームかつ件数がある場合のみ）
+            if has_count_column and record.sales_count > 0 and record.platform.lower() in _COUNT_PLATFORMS:
+                row_values.append((self.COL_W, record.sales_count))
+                count_rows += 1
+            
+            row_values.append((self.COL_Y, record.information_fee))  # Y列：情報提供料額
+            rows.append((row_values, record.rate))
+        
+        if self._debug:
+            self.logger.debug("明細行を準備しました: %d件 (件数記入 %d件)", len(rows), count_rows)
+        
+        return rows
+    
+    def _previous_month_end(self, year: int, month: int) -> datetime:
+        """指定年月の前月末日を取得"""
+        return datetime(year, month, 1) - timedelta(days=1)
     
     def _format_target_month_for_display(self, target_month: str) -> str:
         """YYYYMM形式をYYYY年MM月形式に変換"""
         try:
-            # target_monthをYYYYMM形式と仮定
-            year = int(target_month[:4])
-            month = int(target_month[4:])
-            
-            # YYYY年MM月形式で返す
-            return f"{year}年{month:02d}月"
+            # 同じ年月は何度も現れるため変換結果を再利用
+            display = self._display_month_cache.get(target_month)
+            if display is None:
+                # target_monthをYYYYMM形式と仮定
+                year, month = divmod(int(target_month), 100)
+                
+                # YYYY年MM月形式で返す
+                display = f"{year}年{month:02d}月"
+                self._display_month_cache[target_month] = display
+            return display
             
         except Exception as e:
             self.logger.error(f"対象年月フォーマットエラー: {e}")
             return target_month  # エラー時は元の値を返す
     
-    def _safe_write_cell(self, worksheet: Worksheet, cell_address: str, value) -> None:
+    def _safe_write_cell(self, worksheet: Worksheet, row: int, column: int, value) -> None:
         """セルに安全に値を書き込み（マージセル対応）"""
-        try:
-            # 直接的なアプローチ：マージセルエラーをキャッチして処理
-            try:
-                worksheet[cell_address].value = value
-                self.logger.debug(f"セル {cell_address} に正常に書き込みました: {value}")
-            except Exception as write_error:
-                if "'MergedCell' object attribute 'value' is read-only" in str(write_error):
-                    # マージセルの場合の処理
-                    self._handle_merged_cell_write(worksheet, cell_address, value)
-                else:
-                    # 他のエラーの場合
-                    self.logger.warning(f"セル {cell_address} への書き込みエラー: {write_error}")
-            
-        except Exception as e:
-            self.logger.warning(f"セル {cell_address} への書き込み処理エラー: {e}")
+        cell = worksheet.cell(row=row, column=column)
+        
+        # マージ範囲内のセルは対応表から左上セルに書き込む
+        if isinstance(cell, MergedCell):
+            self._handle_merged_cell_write(worksheet, row, column, value)
+            return
+        
+        cell.value = value
+        if self._debug:
+            self.logger.debug("セル %s に正常に書き込みました: %s", cell.coordinate, value)
     
-    def _handle_merged_cell_write(self, worksheet: Worksheet, cell_address: str, value) -> None:
+    def _handle_merged_cell_write(self, worksheet: Worksheet, row: int, column: int, value) -> None:
         """マージセル書き込み処理"""
-        try:
-            # マージされた範囲を検索
-            from openpyxl.utils import coordinate_to_tuple
-            row, col = coordinate_to_tuple(cell_address)
-            
-            for merged_range in worksheet.merged_cells.ranges:
-                if merged_range.min_row <= row <= merged_range.max_row and \
-                   merged_range.min_col <= col <= merged_range.max_col:
-                    # マージ範囲の左上セルに書き込み
-                    top_left_address = f"{merged_range.start_cell.column_letter}{merged_range.start_cell.row}"
-                    worksheet[top_left_address].value = value
-                    self.logger.debug(f"マージセル {cell_address} の代わりに {top_left_address} に書き込みました: {value}")
-                    return
-            
-            # マージ範囲が見つからない場合は、強制的に書き込みを試行
-            self.logger.warning(f"マージセル {cell_address} の範囲が特定できません。値: {value}")
-            
-        except Exception as e:
-            self.logger.warning(f"マージセル処理エラー {cell_address}: {e}")
+        top_left = self._merge_map.get((row, column))
+        
+        if top_left is None:
+            self.logger.warning(f"マージセル {get_column_letter(column)}{row} の範囲が特定できません。値: {value}")
+            return
+        
+        # マージ範囲の左上セルに書き込み
+        top_left_cell = worksheet.cell(row=top_left[0], column=top_left[1])
+        top_left_cell.value = value
+        if self._debug:
+            self.logger.debug("マージセル %s%d の代わりに %s に書き込みました: %s", get_column_letter(column), row, top_left_cell.coordinate, value)
+    
+    def _build_merge_map(self, worksheet: Worksheet) -> Dict[Tuple[int, int], Tuple[int, int]]:
+        """マージ範囲内の左上以外のセル座標から左上セル座標への対応表を作成"""
+        merge_map = {}
+        for merged_range in worksheet.merged_cells.ranges:
+            top_left = (merged_range.min_row, merged_range.min_col)
+            for row in range(merged_range.min_row, merged_range.max_row + 1):
+                for col in range(merged_range.min_col, merged_range.max_col + 1):
+                    merge_map[(row, col)] = top_left
+            del merge_map[top_left]
+        return merge_map
     
-    def _write_rate_cell(self, worksheet: Worksheet, cell_address: str, rate_value: float) -> None:
+    def _write_rate_cell(self, worksheet: Worksheet, row: int, column: int, rate_value: float) -> None:
         """料率セルの書き込み（数式がある場合は保持）"""
-        try:
-            cell = worksheet[cell_address]
-            
-            # セルに数式がある場合は保持
-            if hasattr(cell, 'formula') and cell.formula:
-                self.logger.debug(f"セル {cell_address} に数式が存在するため保持: {cell.formula}")
-                return
-            
-            # セルの値が数式の場合も保持
-            if isinstance(cell.value, str) and cell.value.startswith('='):
-                self.logger.debug(f"セル {cell_address} に数式が存在するため保持: {cell.value}")
-                return
-            
-            # 数式がない場合は値を設定
-            self._safe_write_cell(worksheet, cell_address, rate_value)
-            self.logger.debug(f"セル {cell_address} に料率値を設定: {rate_value}")
-            
-        except Exception as e:
-            self.logger.warning(f"料率セル処理エラー {cell_address}: {e}")
-            # エラーが発生した場合は通常の書き込みを試行
-            self._safe_write_cell(worksheet, cell_address, rate_value)
+        cell = worksheet.cell(row=row, column=column)
+        
+        # セルに数式がある場合は保持
+        if getattr(cell, 'formula', None):
+            self.logger.debug("セル %s に数式が存在するため保持: %s", cell.coordinate, cell.formula)
+            return
+        
+        # セルの値が数式の場合も保持
+        if isinstance(cell.value, str) and cell.value.startswith('='):
+            self.logger.debug("セル %s に数式が存在するため保持: %s", cell.coordinate, cell.value)
+            return
+        
+        # 数式がない場合は値を設定
+        self._safe_write_cell(worksheet, row, column, rate_value)
+        if self._debug:
+            self.logger.debug("セル %s に料率値を設定: %s", cell.coordinate, rate_value)
     
     def calculate_payment_amount(self, performance: float, rate: float) -> float:
         """支払額を計算（実績 × 料率）"""
@@ -324,9 +343,10 @@ class ExcelProcessor:
     
     def get_a8_cell_value(self, workbook_path: str) -> str:
         """A8セルの値を取得"""
+        workbook = None
         try:
             # Excelファイルを開く
-            workbook = openpyxl.load_workbook(workbook_path)
+            workbook = openpyxl.load_workbook(workbook_path, read_only=True, **self.LOAD_OPTIONS)
             worksheet = workbook.active
             
             # A8セルの値を取得
@@ -345,7 +365,7 @@ class ExcelProcessor:
             self.logger.error(f"A8セル取得エラー: {e}")
             return ""
         finally:
-            if 'workbook' in locals():
+            if workbook is not None:
                 workbook.close()
 
     def process_excel_file(
@@ -353,23 +373,35 @@ class ExcelProcessor:
         template_name: str, 
         sales_records: List[SalesRecord], 
         target_month: str,
-        content_name: str = None
+        content_name: str = None,
+        output_suffix: str = None
     ) -> str:
         """Excelファイルの完全処理（テンプレート複製 + データ書き込み）"""
+        workbook = None
         try:
+            # 対象年月は明細書ごとに一度だけ解析する
+            year, month = _parse_target_month(target_month)
+            
             # 出力ディレクトリを取得
-            year = target_month[:4]
-            month = target_month[4:]
-            output_dir = self.config.get_output_directory(year, month)
+            output_dir = self.config.get_output_directory(str(year), str(month))
             
             # テンプレートを複製
-            excel_path = self.copy_template(template_name, output_dir, target_month, content_name)
+            excel_path = self.copy_template(template_name, output_dir, target_month, content_name, output_suffix)
             
-            # 支払日を設定
-            self.write_payment_date(excel_path, target_month, template_name)
+            # 複製したファイルを一度だけ開き、日付と明細を書き込んでから保存
+            workbook, worksheet = self._open(excel_path)
             
-            # 明細データを書き込み（処理月とテンプレート名を渡す）
-            self.write_statement_details(excel_path, sales_records, target_month, template_name)
+            # 支払日を設定（S3セルと明細のA列で同じ支払日を使う）
+            payment_date = self._payment_date((year, month), template_name)
+            self._write_payment_date(worksheet, payment_date)
+            
+            # 明細データを書き込み
+            self._write_statement_details(worksheet, sales_records, payment_date)
+            
+            # 書き込み済みのシートで構造を検証
+            self.validate_excel_structure(excel_path, worksheet)
+            
+            workbook.save(excel_path)
             
             self.logger.info(f"Excelファイル処理完了: {excel_path}")
             return excel_path
@@ -377,12 +409,17 @@ class ExcelProcessor:
         except Exception as e:
             self.logger.error(f"Excelファイル処理エラー: {e}")
             raise
+        finally:
+            if workbook is not None:
+                workbook.close()
     
-    def validate_excel_structure(self, workbook_path: str) -> bool:
-        """Excelファイルの構造を検証"""
+    def validate_excel_structure(self, workbook_path: str, worksheet: Optional[Worksheet] = None) -> bool:
+        """Excelファイルの構造を検証（読み込み済みシートが渡された場合は再読み込みしない）"""
+        workbook = None
         try:
-            workbook = openpyxl.load_workbook(workbook_path)
-            worksheet = workbook.active
+            if worksheet is None:
+                workbook = openpyxl.load_workbook(workbook_path, read_only=True, **self.LOAD_OPTIONS)
+                worksheet = workbook.active
             
             # 必要なセルの存在確認
             required_cells = ['S3']  # 支払日セル
@@ -399,5 +436,5 @@ class ExcelProcessor:
             self.logger.error(f"Excelファイル構造検証エラー: {e}")
             return False
         finally:
-            if 'workbook' in locals():
-                workbook.close()
\ No newline at end of file
+            if workbook is not None:
+                workbook.close()
@@ -4,18 +4,29 @@
 システム全体の処理フローを統合管理します。
 """
 
+import os
+import functools
+import platform
+import multiprocessing
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from operator import attrgetter
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
-from collections import defaultdict
+from collections import Counter
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Dict, NamedTuple, Optional, Tuple
 import logging
 
+import pandas as pd
+
 from .config_manager import ConfigManager
 from .sales_data_loader import SalesDataLoader
 from .excel_processor import ExcelProcessor
 from .pdf_converter import PDFConverter
 from .email_processor import EmailProcessor
 from .data_models import SalesRecord, PaymentStatement
+from ._fs_cache import clear_stat_cache, path_exists, stat_paths
 from .logger import SystemLogger
 from .exceptions import (
     ContentPaymentStatementError,
@@ -26,9 +37,30 @@ from .exceptions import (
 )
 
 
+class _AggregatedRecord(NamedTuple):
+    """集計済みレコード（先頭3項目が集計キー、メールアドレスは結合済み）"""
+    platform: str
+    content_name: str
+    template_file: str
+    target_month: str
+    rate: float
+    recipient_email: str
+    performance: float
+    information_fee: float
+    sales_count: int
+
+
+# 集計で使用するSalesRecordの項目（_AggregatedRecordと同じ並び）
+_AGGREGATION_FIELDS = _AggregatedRecord._fields
+_get_aggregation_fields = attrgetter(*_AGGREGATION_FIELDS)
+
+
 class MainController:
     """メインコントローラークラス"""
     
+    # このレコード数を超える場合はpandasで集計する
+    PANDAS_AGGREGATION_THRESHOLD = 5000
+    
     def __init__(self, log_level: str = "INFO"):
         """メインコントローラーを初期化"""
         # ログシステムを初期化
@@ -42,13 +74,16 @@ class MainController:
         self.pdf_converter = PDFConverter()
         self.email_processor = EmailProcessor()
         
+        # メールアドレスの検証結果
+        self._email_validation_cache: Dict[str, bool] = {}
+        
         # 処理統計
-        self.statistics = {
-            'processed_contents': 0,
-            'generated_pdfs': 0,
-            'sent_emails': 0,
-            'errors': 0
-        }
+        self.statistics = Counter(
+            processed_contents=0,
+            generated_pdfs=0,
+            sent_emails=0,
+            errors=0
+        )
     
     def process_payment_statements(self, year: str, month: str, send_emails: bool = True, template_filter: str = None, content_name: str = None, create_drafts: bool = True) -> bool:
         """支払い明細書の完全処理を実行"""
@@ -56,19 +91,27 @@ class MainController:
             self.system_logger.log_system_info()
             self.logger.info(f"支払い明細書処理を開始: {year}年{month}月")
             
+            # 前回の処理以降に入力ファイルが追加・削除されている場合に備え、存在確認の結果を破棄
+            clear_stat_cache()
+            
             # 必要なファイルの存在確認
             if not self._validate_required_files(year, month):
                 return False
             
             # 売上データを読み込み（特定のコンテンツがある場合はフィルター適用）
             sales_records = self._load_sales_data(year, month, content_name)
-            if not sales_records:
+            
+            # コンテンツ別に支払い明細書を作成（売上レコードは読み込みながら集計する）
+            payment_statements, record_count = self._group_records_by_content(sales_records)
+            self.system_logger.log_data_summary(
+                "売上レコード", 
+                record_count,
+                f"{year}年{month}月"
+            )
+            if not record_count:
                 self.logger.error("有効な売上データが見つかりません")
                 return False
             
-            # コンテンツ別に支払い明細書を作成
-            payment_statements = self._group_records_by_content(sales_records)
-            
             # テンプレートフィルターが指定されている場合はフィルタリング（さらなる絞り込み）
             if template_filter:
                 filtered_statements = {}
@@ -86,18 +129,29 @@ class MainController:
             success_count = 0
             total_count = len(payment_statements)
             
-            for i, (content_key, statement) in enumerate(payment_statements.items(), 1):
-                try:
-                    self.system_logger.log_progress(i, total_count, f"処理中: {content_key}")
-                    
-                    if self._process_single_statement(statement, year, month, send_emails, content_name, create_drafts):
-                        success_count += 1
-                    else:
-                        self.statistics['errors'] += 1
-                        
-                except Exception as e:
-                    self.system_logger.log_error_details(e, f"支払い明細書処理: {content_key}")
-                    self.statistics['errors'] += 1
+            # Gmail APIの接続は全明細書のメール下書き作成で使い回す
+            with self.email_processor:
+                if platform.system() != 'Windows' and self.pdf_converter.find_libreoffice():
+                    # Excelが使えない環境ではLibreOfficeで全明細書をまとめてPDF変換
+                    success_count = self._process_statements_batch(payment_statements, year, month, send_emails, content_name, create_drafts)
+                elif total_count > 1:
+                    # 明細書ごとのExcel作成・PDF変換はワーカープロセスで並列実行
+                    success_count = self._process_statements_parallel(payment_statements, year, month, send_emails, content_name, create_drafts)
+                else:
+                    # PDF変換用のExcelは全明細書で1つのインスタンスを使い回す
+                    with self.pdf_converter:
+                        for i, (content_key, statement) in enumerate(payment_statements.items(), 1):
+                            try:
+                                self._log_progress(i, total_count, content_key)
+                            
+                                if self._process_single_statement(statement, year, month, send_emails, content_name, create_drafts):
+                                    success_count += 1
+                                else:
+                                    self.statistics['errors'] += 1
+                                
+                            except Exception as e:
+                                self.system_logger.log_error_details(e, f"支払い明細書処理: {_format_statement_key(content_key)}")
+                                self.statistics['errors'] += 1
             
             # 処理結果をログに記録
             self._log_processing_results(success_count, total_count)
@@ -142,132 +196,253 @@ class MainController:
             self.system_logger.log_error_details(e, "ファイル存在確認")
             return False
     
-    def _load_sales_data(self, year: str, month: str, content_filter: str = None) -> List[SalesRecord]:
-        """売上データを読み込み"""
+    def _load_sales_data(self, year: str, month: str, content_filter: str = None) -> Iterator[SalesRecord]:
+        """売上データを読み込み（SalesRecordは集計時に順次生成される）"""
         try:
             if content_filter:
                 self.logger.info(f"売上データの読み込みを開始（{content_filter}のみ）")
             else:
                 self.logger.info("売上データの読み込みを開始")
             
-            sales_records = self.data_loader.create_sales_records(year, month, content_filter)
-            
-            self.system_logger.log_data_summary(
-                "売上レコード", 
-                len(sales_records),
-                f"{year}年{month}月"
-            )
-            
-            return sales_records
+            return self.data_loader.iter_sales_records(year, month, content_filter)
             
         except Exception as e:
             self.system_logger.log_error_details(e, "売上データ読み込み")
             raise DataValidationError(f"売上データ読み込みエラー: {e}")
     
-    def _group_records_by_content(self, sales_records: List[SalesRecord]) -> Dict[str, PaymentStatement]:
-        """売上レコードをコンテンツ別にグループ化し、同一プラットフォーム・同一コンテンツは合計"""
+    def _group_records_by_content(self, sales_records: Iterable[SalesRecord]) -> Tuple[Dict[Tuple[str, str], PaymentStatement], int]:
+        """売上レコードをコンテンツ別にグループ化し、同一プラットフォーム・同一コンテンツは合計（明細書と入力レコード数を返す）"""
         try:
-            # まず、プラットフォーム・コンテンツ・テンプレートで集計
-            aggregated_records = defaultdict(lambda: {
-                'platform': '',
-                'content_name': '',
-                'template_file': '',
-                'target_month': '',
-                'rate': 0.0,
-                'recipient_email': '',
-                'total_performance': 0.0,
-                'total_information_fee': 0.0,
-                'total_sales_count': 0
-            })
-            
-            # 同一プラットフォーム・同一コンテンツを集計（メールアドレスの重複を排除）
-            for record in sales_records:
-                key = f"{record.platform}_{record.content_name}_{record.template_file}"
-                
-                agg = aggregated_records[key]
-                if not agg['platform']:  # 初回の場合は基本情報を設定
-                    agg['platform'] = record.platform
-                    agg['content_name'] = record.content_name
-                    agg['template_file'] = record.template_file
-                    agg['target_month'] = record.target_month
-                    agg['rate'] = record.rate
-                    agg['recipient_email'] = record.recipient_email
-                    # 初回のみ実績・情報提供料・売上件数を設定（重複を防ぐ）
-                    agg['total_performance'] = record.performance
-                    agg['total_information_fee'] = record.information_fee
-                    agg['total_sales_count'] = record.sales_count
-                    self.logger.debug(f"集計キー初期化: {key} - 実績:{record.performance}, 情報提供料:{record.information_fee}")
-                else:
-                    # 同一プラットフォーム・同一コンテンツのレコードは加算しない（メールアドレス分の重複を防ぐ）
-                    self.logger.debug(f"集計キー重複検出（スキップ）: {key} - 実績:{record.performance}, 情報提供料:{record.information_fee}")
-                    # メールアドレスを結合（必要に応じて）
-                    if record.recipient_email not in agg['recipient_email']:
-                        agg['recipient_email'] += f", {record.recipient_email}"
+            # プラットフォーム・コンテンツ・テンプレートで集計
+            aggregated_records, record_count = self._aggregate_records(sales_records)
             
-            # 集計されたレコードをSalesRecordに変換してグループ化
-            grouped_records = defaultdict(list)
+            # 集計結果から直接PaymentStatementを作成（テンプレートファイル・メールアドレス別）
+            # 明細書のキーとなるメールアドレスは同一キーの後続レコードで結合されるため、
+            # 全レコードの集計が終わるまで明細書へ振り分けられない（集計→明細書作成の2段階が最小）
+            payment_statements = {}
             
-            for key, agg in aggregated_records.items():
+            for agg in aggregated_records:
                 # 集計されたデータからSalesRecordを作成
                 aggregated_record = SalesRecord(
-                    platform=agg['platform'],
-                    content_name=agg['content_name'],
-                    performance=agg['total_performance'],
-                    information_fee=agg['total_information_fee'],
-                    target_month=agg['target_month'],
-                    template_file=agg['template_file'],
-                    rate=agg['rate'],
-                    recipient_email=agg['recipient_email'],
-                    sales_count=agg['total_sales_count']
+                    platform=agg.platform,
+                    content_name=agg.content_name,
+                    performance=agg.performance,
+                    information_fee=agg.information_fee,
+                    target_month=agg.target_month,
+                    template_file=agg.template_file,
+                    rate=agg.rate,
+                    recipient_email=agg.recipient_email,
+                    sales_count=agg.sales_count
                 )
                 
-                # テンプレートファイル・メールアドレス別にグループ化
-                group_key = f"{agg['template_file']}_{agg['recipient_email']}"
-                grouped_records[group_key].append(aggregated_record)
-            
-            # PaymentStatementオブジェクトを作成
-            payment_statements = {}
-            
-            for key, records in grouped_records.items():
-                if not records:
-                    continue
-                
-                # 代表レコードから情報を取得
-                sample_record = records[0]
+                group_key = (agg.template_file, agg.recipient_email)
+                statement = payment_statements.get(group_key)
                 
-                # 合計値を計算
-                total_performance = sum(r.performance for r in records)
-                total_information_fee = sum(r.information_fee for r in records)
+                if statement is None:
+                    # 最初のレコードを代表として明細書を作成
+                    statement = PaymentStatement(
+                        content_name=agg.content_name,
+                        template_file=agg.template_file,
+                        sales_records=[],
+                        total_performance=0.0,
+                        total_information_fee=0.0,
+                        payment_date=_payment_date_for(agg.target_month),
+                        recipient_email=agg.recipient_email
+                    )
+                    payment_statements[group_key] = statement
                 
-                # 翌月5日の支払日を計算
-                target_month = sample_record.target_month
-                year = int(target_month[:4])
-                month = int(target_month[4:])
-                
-                if month == 12:
-                    payment_date = datetime(year + 1, 1, 5)
-                else:
-                    payment_date = datetime(year, month + 1, 5)
-                
-                statement = PaymentStatement(
-                    content_name=sample_record.content_name,
-                    template_file=sample_record.template_file,
-                    sales_records=records,
-                    total_performance=total_performance,
-                    total_information_fee=total_information_fee,
-                    payment_date=payment_date,
-                    recipient_email=sample_record.recipient_email
-                )
-                
-                payment_statements[key] = statement
+                # 合計値を加算
+                statement.sales_records.append(aggregated_record)
+                statement.total_performance += agg.performance
+                statement.total_information_fee += agg.information_fee
             
             self.logger.info(f"支払い明細書をグループ化しました: {len(payment_statements)}件")
-            return payment_statements
+            return payment_statements, record_count
             
         except Exception as e:
             self.system_logger.log_error_details(e, "レコードグループ化")
             raise
     
+    def _aggregate_records(self, sales_records: Iterable[SalesRecord]) -> Tuple[List[_AggregatedRecord], int]:
+        """同一プラットフォーム・同一コンテンツ・同一テンプレートのレコードを集計
+        
+        戻り値は集計済みレコードのリストと入力レコード数。
+        実績・情報提供料・売上件数は最初のレコードの値を使い、メールアドレスのみ結合する。
+        """
+        # 件数が閾値を超えるかは先頭だけを読んで判定し、超える場合は残りと合わせてpandasで集計
+        sales_records = iter(sales_records)
+        head_records = list(islice(sales_records, self.PANDAS_AGGREGATION_THRESHOLD + 1))
+        if len(head_records) > self.PANDAS_AGGREGATION_THRESHOLD:
+            return self._aggregate_records_with_pandas(chain(head_records, sales_records))
+        
+        # キーごとに最初のレコードの項目タプルを保持し、結合したメールアドレスは別に持つ
+        aggregated_records: Dict[Tuple[str, str, str], tuple] = {}
+        joined_emails: Dict[Tuple[str, str, str], str] = {}
+        
+        # ループ内の属性・メソッド参照を事前に束縛
+        get_fields = _get_aggregation_fields
+        get_aggregated = aggregated_records.get
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        
+        # 同一プラットフォーム・同一コンテンツを集計（メールアドレスの重複を排除）
+        for record in head_records:
+            fields = get_fields(record)
+            key = fields[:3]  # (platform, content_name, template_file)
+            
+            agg = get_aggregated(key)
+            if agg is None:  # 初回の場合は基本情報を設定
+                # 初回のみ実績・情報提供料・売上件数を設定（重複を防ぐ）
+                aggregated_records[key] = fields
+                if debug:
+                    self.logger.debug("集計キー初期化: %s - 実績:%s, 情報提供料:%s", key, fields[6], fields[7])
+            else:
+                # 同一プラットフォーム・同一コンテンツのレコードは加算しない（メールアドレス分の重複を防ぐ）
+                if debug:
+                    self.logger.debug("集計キー重複検出（スキップ）: %s - 実績:%s, 情報提供料:%s", key, fields[6], fields[7])
+                # メールアドレスを結合（必要に応じて）
+                recipient_email = fields[5]
+                joined_email = joined_emails.get(key, agg[5])
+                if recipient_email not in joined_email:
+                    joined_emails[key] = f"{joined_email}, {recipient_email}"
+        
+        aggregated = [_AggregatedRecord._make(fields) for fields in aggregated_records.values()]
+        if joined_emails:
+            aggregated = [
+                agg._replace(recipient_email=joined_emails[key]) if key in joined_emails else agg
+                for key, agg in zip(aggregated_records, aggregated)
+            ]
+        
+        return aggregated, len(head_records)
+    
+    def _aggregate_records_with_pandas(self, sales_records: Iterable[SalesRecord]) -> Tuple[List[_AggregatedRecord], int]:
+        """大量レコードの集計をpandasで実行（_aggregate_recordsと同じ結果を返す）"""
+        key_columns = list(_AGGREGATION_FIELDS[:3])
+        df = pd.DataFrame.from_records(map(_get_aggregation_fields, sales_records), columns=_AGGREGATION_FIELDS)
+        
+        # 各キーの最初のレコードを代表値とする
+        first_rows = df.drop_duplicates(key_columns)
+        
+        # メールアドレスはキーごとに重複を除いた出現順のリストにしてから結合
+        emails = (
+            df.drop_duplicates(key_columns + ['recipient_email'])
+            .groupby(key_columns, sort=False, dropna=False)['recipient_email']
+            .agg(list)
+        )
+        
+        aggregated_records = []
+        for row, recipient_emails in zip(first_rows.itertuples(index=False, name=None), emails):
+            joined_email = recipient_emails[0]
+            for recipient_email in recipient_emails[1:]:
+                if recipient_email not in joined_email:
+                    joined_email += f", {recipient_email}"
+            
+            aggregated_records.append(_AggregatedRecord._make(row)._replace(recipient_email=joined_email))
+        
+        self.logger.debug("pandasで集計しました: %d件 -> %d件", len(df), len(aggregated_records))
+        return aggregated_records, len(df)
+    
+    def _process_statements_parallel(
+        self,
+        payment_statements: Dict[Tuple[str, str], PaymentStatement],
+        year: str,
+        month: str,
+        send_email: bool,
+        content_name: str = None,
+        create_drafts: bool = True
+    ) -> int:
+        """Excel作成・PDF変換をプロセス並列で行い、完了した順にメール下書きを作成（成功件数を返す）"""
+        target_month = f"{year}{month.zfill(2)}"
+        total_count = len(payment_statements)
+        workers = min(os.cpu_count() or 1, total_count)
+        success_count = 0
+        
+        # 同じ出力ファイル名になる明細書がワーカー間で同じファイルに書き込まないよう連番を付ける
+        output_suffixes = _statement_output_suffixes(payment_statements, content_name)
+        
+        self.logger.info(f"支払い明細書の並列処理を開始: {total_count}件 (ワーカー数: {workers})")
+        
+        # COMはスレッド・プロセス状態を引き継げないため、どのOSでもspawnでワーカーを起動する
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_render_worker,
+            initargs=(self.config, logging.getLevelName(self.system_logger.log_level), self.system_logger.log_file)
+        ) as executor:
+            futures = {
+                executor.submit(_render_statement_in_worker, statement, target_month, content_name, output_suffixes[content_key]): (content_key, statement)
+                for content_key, statement in payment_statements.items()
+            }
+            
+            # メール下書き作成（I/O待ち）は、残りの明細書の変換と並行してメインプロセスで行う
+            for i, future in enumerate(as_completed(futures), 1):
+                content_key, statement = futures[future]
+                try:
+                    self._log_progress(i, total_count, content_key)
+                    
+                    excel_path, pdf_path = future.result()
+                    if self._complete_statement(statement, target_month, excel_path, pdf_path, send_email, create_drafts):
+                        success_count += 1
+                    else:
+                        self.statistics['errors'] += 1
+                        
+                except Exception as e:
+                    self.system_logger.log_error_details(e, f"支払い明細書処理: {_format_statement_key(content_key)}")
+                    self.statistics['errors'] += 1
+        
+        return success_count
+    
+    def _process_statements_batch(
+        self,
+        payment_statements: Dict[Tuple[str, str], PaymentStatement],
+        year: str,
+        month: str,
+        send_email: bool,
+        content_name: str = None,
+        create_drafts: bool = True
+    ) -> int:
+        """全明細書のExcelを作成してからLibreOfficeで一括PDF変換し、メール下書きを作成（成功件数を返す）"""
+        target_month = f"{year}{month.zfill(2)}"
+        total_count = len(payment_statements)
+        success_count = 0
+        
+        # 全明細書を作成してから変換するため、同じ出力ファイル名になる明細書には連番を付けて上書きを防ぐ
+        output_suffixes = _statement_output_suffixes(payment_statements, content_name)
+        
+        # Excelファイルを作成
+        rendered = []
+        for content_key, statement in payment_statements.items():
+            try:
+                excel_path = self.excel_processor.process_excel_file(
+                    statement.template_file,
+                    statement.sales_records,
+                    target_month,
+                    content_name,
+                    output_suffixes[content_key]
+                )
+                rendered.append((content_key, statement, excel_path))
+            except Exception as e:
+                self.system_logger.log_error_details(e, f"支払い明細書処理: {_format_statement_key(content_key)}")
+                self.statistics['errors'] += 1
+        
+        # 出力ディレクトリごとに1回だけLibreOfficeを起動して変換
+        pdf_paths = {}
+        excel_paths_by_dir = {}
+        for _, _, excel_path in rendered:
+            excel_paths_by_dir.setdefault(str(Path(excel_path).parent), []).append(excel_path)
+        for out_dir, excel_paths in excel_paths_by_dir.items():
+            pdf_paths.update(zip(excel_paths, self.pdf_converter.convert_batch_libreoffice(excel_paths, out_dir)))
+        
+        # メール下書きを作成
+        for i, (content_key, statement, excel_path) in enumerate(rendered, 1):
+            self._log_progress(i, total_count, content_key)
+            
+            if self._complete_statement(statement, target_month, excel_path, pdf_paths.get(excel_path), send_email, create_drafts):
+                success_count += 1
+            else:
+                self.statistics['errors'] += 1
+        
+        return success_count
+    
     def _process_single_statement(
         self, 
         statement: PaymentStatement, 
@@ -281,25 +456,36 @@ class MainController:
         try:
             target_month = f"{year}{month.zfill(2)}"
             
-            # Excelファイルを処理
-            excel_path = self.excel_processor.process_excel_file(
-                statement.template_file,
-                statement.sales_records,
-                target_month,
-                content_name
-            )
+            # Excelファイルを処理してPDFに変換
+            excel_path, pdf_path = _render_statement(self.excel_processor, self.pdf_converter, statement, target_month, content_name)
             
-            self.system_logger.log_file_operation("Excel処理", excel_path, True)
-            self.statistics['processed_contents'] += 1
+            return self._complete_statement(statement, target_month, excel_path, pdf_path, send_email, create_drafts)
             
-            # PDFに変換
-            pdf_path = self.pdf_converter.convert_and_validate(excel_path)
+        except Exception as e:
+            self.system_logger.log_error_details(e, f"支払い明細書処理: {statement.content_name}")
+            return False
+    
+    def _complete_statement(
+        self,
+        statement: PaymentStatement,
+        target_month: str,
+        excel_path: str,
+        pdf_path: Optional[str],
+        send_email: bool,
+        create_drafts: bool = True
+    ) -> bool:
+        """変換結果を記録し、必要に応じてメール下書きを作成"""
+        # この明細書の処理件数（最後にまとめて統計へ反映）
+        result = {}
+        try:
+            self.system_logger.log_file_operation("Excel処理", excel_path, True)
+            result['processed_contents'] = 1
             
             if not pdf_path:
                 raise PDFConversionError(f"PDF変換に失敗しました: {excel_path}")
             
             self.system_logger.log_file_operation("PDF変換", pdf_path, True)
-            self.statistics['generated_pdfs'] += 1
+            result['generated_pdfs'] = 1
             
             # メール下書き作成
             if send_email and create_drafts and self._validate_email_address(statement.recipient_email):
@@ -315,7 +501,7 @@ class MainController:
                     addressee_name,
                     statement.content_name  # content_idとしてcontent_nameを使用
                 ):
-                    self.statistics['sent_emails'] += 1
+                    result['sent_emails'] = 1
                     self.logger.info(f"メール下書き作成完了: {statement.recipient_email}")
                 else:
                     raise EmailSendError(f"メール下書き作成に失敗しました: {statement.recipient_email}")
@@ -325,6 +511,8 @@ class MainController:
         except Exception as e:
             self.system_logger.log_error_details(e, f"支払い明細書処理: {statement.content_name}")
             return False
+        finally:
+            self.statistics.update(result)
     
     def _validate_email_address(self, email: str) -> bool:
         """メールアドレスの検証"""
@@ -339,13 +527,26 @@ class MainController:
             
             all_valid = True
             for addr in email_list:
-                if not self.email_processor.validate_email_address(addr):
+                if not self._validate_single_email_address(addr):
                     all_valid = False
                     self.logger.warning(f"無効なメールアドレス: {addr}")
             
             return all_valid
         
-        return self.email_processor.validate_email_address(email)
+        return self._validate_single_email_address(email)
+    
+    def _validate_single_email_address(self, email: str) -> bool:
+        """1件のメールアドレスを検証（同じ宛先は複数の明細書に現れるため結果を再利用）"""
+        is_valid = self._email_validation_cache.get(email)
+        if is_valid is None:
+            is_valid = self.email_processor.validate_email_address(email)
+            self._email_validation_cache[email] = is_valid
+        return is_valid
+    
+    def _log_progress(self, current: int, total: int, content_key: Tuple[str, str]) -> None:
+        """進捗をログに記録（明細書が多い場合は約1%ごとと最後の1件のみ）"""
+        if current == total or current % max(1, total // 100) == 0:
+            self.system_logger.log_progress(current, total, f"処理中: {_format_statement_key(content_key)}")
     
     def _log_processing_results(self, success_count: int, total_count: int) -> None:
         """処理結果をログに記録"""
@@ -365,6 +566,9 @@ class MainController:
         try:
             output_dir = self.config.get_output_directory(year, month)
             
+            # Excelインスタンスが残っていれば終了してからクリーンアップ
+            self.pdf_converter.shutdown()
+            
             # 一時ファイルのクリーンアップ
             self.pdf_converter.cleanup_temp_files(output_dir)
             
@@ -403,8 +607,8 @@ class MainController:
         """ファイルアクセステスト"""
         try:
             # 基本ディレクトリの存在確認
-            for path_name, path_value in self.config.base_paths.items():
-                if not Path(path_value).exists():
+            for (path_name, path_value), stat in zip(self.config.base_paths.items(), stat_paths(self.config.base_paths.values())):
+                if stat is None:
                     self.logger.warning(f"パスが存在しません: {path_name} = {path_value}")
                     return False
             
@@ -424,7 +628,7 @@ class MainController:
             ]
             
             for file_path in required_files:
-                if not Path(file_path).exists():
+                if not path_exists(file_path):
                     self.logger.warning(f"設定ファイルが存在しません: {file_path}")
                     return False
             
@@ -432,4 +636,84 @@ class MainController:
             
         except Exception as e:
             self.logger.error(f"設定テストエラー: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+@functools.lru_cache(maxsize=64)
+def _payment_date_for(target_month: str) -> datetime:
+    """対象年月（YYYYMM）の翌月5日の支払日を取得（同じ対象年月は一度だけ計算）"""
+    year, month = divmod(int(target_month), 100)
+    return datetime(year + month // 12, month % 12 + 1, 5)
+
+
+def _format_statement_key(statement_key: Tuple[str, str]) -> str:
+    """明細書のキー（テンプレートファイル, メールアドレス）をログ表示用の文字列に変換"""
+    return '_'.join(statement_key)
+
+
+def _statement_output_suffixes(
+    payment_statements: Dict[Tuple[str, str], PaymentStatement],
+    content_name: str = None
+) -> Dict[Tuple[str, str], Optional[str]]:
+    """明細書ごとの出力ファイル名の接尾辞を取得（同じファイル名になる明細書が複数ある場合のみ連番を付ける）"""
+    # 出力ファイル名はコンテンツ名（指定時）またはテンプレート名と対象年月から決まる
+    base_names = {
+        content_key: content_name or Path(statement.template_file).stem
+        for content_key, statement in payment_statements.items()
+    }
+    base_counts = Counter(base_names.values())
+    
+    output_suffixes = {}
+    numbers = Counter()
+    for content_key, base_name in base_names.items():
+        if base_counts[base_name] > 1:
+            numbers[base_name] += 1
+            output_suffixes[content_key] = str(numbers[base_name])
+        else:
+            output_suffixes[content_key] = None
+    return output_suffixes
+
+
+# ワーカープロセスごとのExcel処理・PDF変換インスタンス（_init_render_workerで設定）
+_worker_excel_processor: Optional[ExcelProcessor] = None
+_worker_pdf_converter: Optional[PDFConverter] = None
+
+
+def _init_render_worker(config: ConfigManager, log_level: str = "INFO", log_file: Optional[str] = None) -> None:
+    """ワーカープロセスの初期化（Excel COMインスタンスはワーカーごとに1つ起動して使い回す）"""
+    global _worker_excel_processor, _worker_pdf_converter
+    
+    # spawnで起動したワーカーにはログ設定が引き継がれないため、メインプロセスと同じ出力先を設定
+    SystemLogger(log_level, log_file)
+    
+    _worker_excel_processor = ExcelProcessor(config)
+    _worker_pdf_converter = PDFConverter()
+    _worker_pdf_converter.start()
+    
+    # ワーカー終了時にExcelインスタンスを終了
+    Finalize(_worker_pdf_converter, _worker_pdf_converter.shutdown, exitpriority=10)
+
+
+def _render_statement_in_worker(statement: PaymentStatement, target_month: str, content_name: str = None, output_suffix: str = None) -> Tuple[str, Optional[str]]:
+    """ワーカープロセスで1件の支払い明細書のExcel作成・PDF変換を実行"""
+    return _render_statement(_worker_excel_processor, _worker_pdf_converter, statement, target_month, content_name, output_suffix)
+
+
+def _render_statement(
+    excel_processor: ExcelProcessor,
+    pdf_converter: PDFConverter,
+    statement: PaymentStatement,
+    target_month: str,
+    content_name: str = None,
+    output_suffix: str = None
+) -> Tuple[str, Optional[str]]:
+    """Excelファイルを作成してPDFに変換（ExcelパスとPDFパス、変換失敗時はNoneを返す）"""
+    excel_path = excel_processor.process_excel_file(
+        statement.template_file,
+        statement.sales_records,
+        target_month,
+        content_name,
+        output_suffix
+    )
+    pdf_path = pdf_converter.convert_and_validate(excel_path)
+    return excel_path, pdf_path
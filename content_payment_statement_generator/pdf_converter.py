@@ -5,22 +5,99 @@ ExcelファイルのPDF変換を行います。
 """
 
 import os
+import fnmatch
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 import logging
-import xlwings as xw
 
 
 class PDFConverter:
     """PDF変換クラス"""
     
+    # LibreOfficeの実行ファイル名（見つかった順に使用）
+    LIBREOFFICE_COMMANDS = ('soffice', 'libreoffice')
+    
+    # LibreOfficeの一括変換のタイムアウト（秒）
+    LIBREOFFICE_TIMEOUT = 600
+    
+    # 一時ファイル削除の並行数
+    CLEANUP_WORKERS = 8
+    
+    # Excelの計算モード（xlCalculationManual）
+    XL_CALCULATION_MANUAL = -4135
+    
     def __init__(self):
         """PDF変換クラスを初期化"""
         self.logger = logging.getLogger(__name__)
+        
+        # 変換処理全体で使い回すExcel COMインスタンス（start()で起動）
+        self._excel_app = None
+        self._com_initialized = False
+    
+    def __enter__(self) -> 'PDFConverter':
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
+    
+    def start(self) -> None:
+        """Excel COMインスタンスを起動（以降の変換で再利用）"""
+        if self._excel_app is not None:
+            return
+        
+        try:
+            import pythoncom
+            
+            pythoncom.CoInitialize()
+            self._com_initialized = True
+            self._excel_app = self._create_excel_app()
+            self.logger.info("Excel COMインスタンスを起動しました")
+            
+        except ImportError:
+            self.logger.warning("win32com.clientが利用できません。変換ごとにxlwingsを使用します。")
+        except Exception as e:
+            self.logger.warning(f"Excel COMインスタンス起動エラー（変換ごとに起動します）: {e}")
+            self.shutdown()
+    
+    def shutdown(self) -> None:
+        """Excel COMインスタンスを終了"""
+        try:
+            if self._excel_app is not None:
+                self._excel_app.Quit()
+                self.logger.info("Excel COMインスタンスを終了しました")
+        except Exception as e:
+            self.logger.warning(f"Excel終了エラー: {e}")
+        finally:
+            self._excel_app = None
+        
+        if self._com_initialized:
+            import pythoncom
+            
+            pythoncom.CoUninitialize()
+            self._com_initialized = False
+    
+    def _create_excel_app(self):
+        """非表示のExcelアプリケーションを新規プロセスで起動"""
+        import win32com.client
+        
+        excel_app = win32com.client.DispatchEx("Excel.Application")
+        excel_app.Visible = False
+        excel_app.DisplayAlerts = False
+        excel_app.ScreenUpdating = False
+        excel_app.EnableEvents = False
+        excel_app.AskToUpdateLinks = False
+        return excel_app
     
     def convert_excel_to_pdf(self, excel_path: str) -> str:
         """ExcelファイルをPDF形式に変換"""
         try:
+            # xlwingsは読み込みに時間がかかるため、COMが使えない場合のみ読み込む
+            import xlwings as xw
+            
             excel_file = Path(excel_path)
             
             if not excel_file.exists():
@@ -64,7 +141,6 @@ class PDFConverter:
         """COM経由でExcelファイルをPDF形式に変換（Windows用）"""
         try:
             import win32com.client
-            import pywintypes
             
             excel_file = Path(excel_path)
             
@@ -74,17 +150,28 @@ class PDFConverter:
             # PDF出力パスを生成
             pdf_path = excel_file.with_suffix('.pdf')
             
-            # COMオブジェクトを作成
-            excel_app = None
+            # 起動済みのCOMインスタンスがあれば再利用し、なければこの変換用に起動する
+            excel_app = self._excel_app
+            owns_app = excel_app is None
             workbook = None
             
             try:
-                excel_app = win32com.client.Dispatch("Excel.Application")
-                excel_app.Visible = False
-                excel_app.DisplayAlerts = False
+                if owns_app:
+                    excel_app = self._create_excel_app()
                 
-                # Excelファイルを開く
-                workbook = excel_app.Workbooks.Open(str(excel_file.absolute()))
+                # Excelファイルを開く（外部リンクは更新しない）
+                workbook = excel_app.Workbooks.Open(
+                    str(excel_file.absolute()),
+                    UpdateLinks=0,
+                    ReadOnly=True,
+                    IgnoreReadOnlyRecommended=True
+                )
+                
+                # 自動再計算を止め、出力前にこのブックだけを明示的に再計算する
+                # （計算モードはブックを開いた状態でないと変更できない）
+                if excel_app.Calculation != self.XL_CALCULATION_MANUAL:
+                    excel_app.Calculation = self.XL_CALCULATION_MANUAL
+                self._calculate_workbook(workbook)
                 
                 # PDFとして保存
                 workbook.ExportAsFixedFormat(
@@ -113,7 +200,7 @@ class PDFConverter:
                     self.logger.warning(f"ワークブック終了エラー: {e}")
                 
                 try:
-                    if excel_app is not None:
+                    if owns_app and excel_app is not None:
                         excel_app.Quit()
                         excel_app = None
                 except Exception as e:
@@ -126,18 +213,75 @@ class PDFConverter:
             self.logger.error(f"PDF変換エラー (COM): {e}")
             raise
     
+    def _calculate_workbook(self, workbook) -> None:
+        """数式を含むシートのみ再計算（openpyxlで保存したブックは数式の計算結果を持たない）"""
+        # WorkbookにはCalculateがないためシート単位で再計算する
+        for sheet in workbook.Worksheets:
+            # HasFormulaは数式がないとFalse、一部のセルのみ数式の場合はNone
+            if sheet.UsedRange.HasFormula is not False:
+                sheet.Calculate()
+    
+    def find_libreoffice(self) -> Optional[str]:
+        """LibreOfficeの実行ファイルのパスを取得（見つからない場合はNone）"""
+        for command in self.LIBREOFFICE_COMMANDS:
+            executable = shutil.which(command)
+            if executable:
+                return executable
+        return None
+    
+    def convert_batch_libreoffice(self, excel_paths: List[str], out_dir: str) -> List[Optional[str]]:
+        """LibreOfficeを1回だけ起動して複数のExcelファイルをPDFに変換（入力順にPDFパス、失敗はNone）"""
+        if not excel_paths:
+            return []
+        
+        try:
+            executable = self.find_libreoffice()
+            if executable is None:
+                raise FileNotFoundError("LibreOffice (soffice) が見つかりません")
+            
+            self.logger.info(f"LibreOfficeでPDF一括変換を開始: {len(excel_paths)}件")
+            subprocess.run(
+                [executable, '--headless', '--convert-to', 'pdf', '--outdir', str(out_dir), *map(str, excel_paths)],
+                check=True,
+                timeout=self.LIBREOFFICE_TIMEOUT,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+            
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"PDF一括変換エラー (LibreOffice): {e.stderr.decode(errors='replace').strip() if e.stderr else e}")
+        except Exception as e:
+            self.logger.error(f"PDF一括変換エラー (LibreOffice): {e}")
+        
+        # 出力されたPDFを入力順に対応付ける（一部のファイルだけ変換に失敗する場合がある）
+        pdf_paths = []
+        for excel_path in excel_paths:
+            pdf_path = Path(out_dir) / Path(excel_path).with_suffix('.pdf').name
+            # 以前の実行で残ったPDFを変換結果と取り違えないよう、Excelより新しいものだけを採用
+            try:
+                converted = pdf_path.stat().st_mtime >= Path(excel_path).stat().st_mtime
+            except OSError:
+                converted = False
+            if converted:
+                self.logger.info(f"PDF変換完了 (LibreOffice): {pdf_path}")
+                pdf_paths.append(str(pdf_path))
+            else:
+                self.logger.error(f"PDF変換に失敗しました (LibreOffice): {excel_path}")
+                pdf_paths.append(None)
+        
+        return pdf_paths
+    
     def validate_pdf_output(self, pdf_path: str) -> bool:
         """PDF出力の検証"""
         try:
-            pdf_file = Path(pdf_path)
-            
-            # ファイルの存在確認
-            if not pdf_file.exists():
+            # ファイルの存在確認とサイズ取得を1回のstatで行う
+            try:
+                file_size = os.stat(pdf_path).st_size
+            except FileNotFoundError:
                 self.logger.error(f"PDFファイルが存在しません: {pdf_path}")
                 return False
             
             # ファイルサイズの確認
-            file_size = pdf_file.stat().st_size
             if file_size == 0:
                 self.logger.error(f"PDFファイルが空です: {pdf_path}")
                 return False
@@ -168,23 +312,31 @@ class PDFConverter:
     def cleanup_temp_files(self, directory: str, pattern: str = "~$*.tmp") -> None:
         """一時ファイルをクリーンアップ"""
         try:
-            temp_dir = Path(directory)
-            
-            if not temp_dir.exists():
+            if not os.path.isdir(directory):
                 return
             
-            # 一時ファイルを検索して削除
-            temp_files = list(temp_dir.glob(pattern))
+            # 一時ファイルを検索（Pathオブジェクトを作らずにディレクトリを1回だけ走査）
+            with os.scandir(directory) as entries:
+                temp_files = [entry.path for entry in entries if entry.is_file() and fnmatch.fnmatch(entry.name, pattern)]
             
-            for temp_file in temp_files:
-                try:
-                    temp_file.unlink()
-                    self.logger.debug(f"一時ファイルを削除しました: {temp_file}")
-                except Exception as e:
-                    self.logger.warning(f"一時ファイル削除エラー: {temp_file} - {e}")
+            if not temp_files:
+                return
+            
+            # 削除はI/O待ちのためスレッドで並行して行う
+            with ThreadPoolExecutor(max_workers=min(self.CLEANUP_WORKERS, len(temp_files))) as executor:
+                removed = sum(executor.map(self._remove_temp_file, temp_files))
             
-            if temp_files:
-                self.logger.info(f"一時ファイルクリーンアップ完了: {len(temp_files)}件")
+            self.logger.info(f"一時ファイルクリーンアップ完了: {removed}件")
                 
         except Exception as e:
-            self.logger.error(f"一時ファイルクリーンアップエラー: {e}")
\ No newline at end of file
+            self.logger.error(f"一時ファイルクリーンアップエラー: {e}")
+    
+    def _remove_temp_file(self, temp_file: str) -> bool:
+        """一時ファイルを1件削除（成功時True）"""
+        try:
+            os.unlink(temp_file)
+            self.logger.debug(f"一時ファイルを削除しました: {temp_file}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"一時ファイル削除エラー: {temp_file} - {e}")
+            return False
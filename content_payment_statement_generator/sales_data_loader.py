@@ -4,12 +4,253 @@
 各種CSVファイルからのデータ読み込みと統合を行います。
 """
 
+import os
+import re
+import sys
+import hashlib
+import functools
+import itertools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 import logging
 from .config_manager import ConfigManager
 from .data_models import SalesRecord
+from ._fs_cache import path_exists
+
+try:
+    import pyarrow  # noqa: F401  pandasのpyarrow CSVエンジンで使用
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+
+# 月別売上ファイルのうち検索・SalesRecord作成で参照する列（ファイルにより列名が異なるため候補をすべて含める）
+MONTHLY_SALES_COLUMNS = ('年月', 'YYYYMM', 'プラットフォーム', 'ISP', 'コンテンツ', 'コンテンツ名', '実績', '情報提供料', '売上件数')
+MONTHLY_SALES_MONTH_COLUMNS = ('年月', 'YYYYMM')
+
+# プラットフォーム名（小文字）-> contents_mapping.csvの列名
+PLATFORM_COLUMN_MAP = {
+    'mediba': 'mediba',  # medibaは独立したプラットフォーム
+    'line': 'LINE',
+    'satori': 'ameba',   # satoriプラットフォームはameba列を参照
+    'ameba': 'ameba',    # amebaプラットフォームはameba列を参照
+    'rakuten': '楽天',   # rakutenは楽天列を使用
+    '楽天': '楽天',
+    'excite': 'excite',
+}
+
+# プラットフォーム名（小文字）-> 売上データ検索時に同一とみなすプラットフォーム名
+SEARCH_PLATFORM_MAP = {
+    'ameba': ('ameba', 'satori'),  # amebaはsatoriデータも含む
+    'satori': ('ameba', 'satori'),
+    'mediba': ('mediba',),  # medibaは独立したプラットフォーム
+    'line': ('line',),
+    'rakuten': ('rakuten', '楽天'),
+    '楽天': ('rakuten', '楽天'),
+    'excite': ('excite',),
+}
+
+# レート情報にメールアドレスがない場合の送付先
+DEFAULT_RECIPIENT_EMAIL = 'mizoguchi@outward.jp'
+
+# コンテンツ名の空白正規化用の変換表（全角スペースを半角に / 全角・半角スペースを除去）
+SPACE_NORMALIZE_TABLE = str.maketrans({'\u3000': ' '})
+SPACE_REMOVE_TABLE = str.maketrans('', '', '\u3000 ')
+
+# 月別売上ファイルを分割して読み込む際の1回あたりの行数
+MONTHLY_SALES_CHUNK_SIZE = 200_000
+
+# 対象年月ごとの統合データを並行して作成するスレッド数
+MONTH_LOAD_WORKERS = 8
+
+# 月別売上ファイルの解析結果をFeather形式で保存するディレクトリ（pyarrowがある場合のみ使用）
+FEATHER_CACHE_DIR = Path(__file__).parent.parent / '.cache' / 'csv_cache'
+
+# Featherキャッシュの合計サイズの上限（超えた分は古いファイルから削除）
+FEATHER_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=32)
+def _read_csv_cached(path_str: str, mtime_ns: int) -> pd.DataFrame:
+    """CSVを読み込み（パスと更新時刻をキーにキャッシュ。返すDataFrameは共有されるため変更しないこと）"""
+    return pd.read_csv(path_str, encoding='utf-8-sig', memory_map=True, low_memory=False)
+
+
+def _read_csv(file_path: str) -> pd.DataFrame:
+    """CSVを読み込み（ファイルが更新されていなければ前回の解析結果を再利用）"""
+    path_str = str(file_path)
+    return _read_csv_cached(path_str, os.stat(path_str).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=4096)
+def _template_stem(template_file: str) -> str:
+    """テンプレートファイル名から拡張子を除いた名前を取得（同じテンプレートは計算済みの値を再利用）"""
+    return Path(template_file).stem
+
+
+@functools.lru_cache(maxsize=4096)
+def _excel_file_name(template_name: str) -> str:
+    """テンプレート名にExcelの拡張子がなければ.xlsxを付加"""
+    return template_name if template_name.endswith(('.xlsx', '.xls')) else template_name + '.xlsx'
+
+
+def _read_csv_with_feather_cache(path_str: str, mtime_ns: int, usecols: Optional[List[str]]) -> pd.DataFrame:
+    """CSVをpyarrowで読み込み（前回の実行で保存したFeatherファイルがあればそちらを読み込む）"""
+    # キャッシュファイル名はCSVのパスと更新時刻から決め、CSVが更新されたら古いファイルは削除する
+    path_key = hashlib.sha1(path_str.encode('utf-8')).hexdigest()
+    cache_path = FEATHER_CACHE_DIR / f"{path_key}-{mtime_ns}.feather"
+    
+    try:
+        return pd.read_feather(cache_path)
+    except Exception:
+        pass  # キャッシュがない・読めない場合はCSVから読み込む
+    
+    df = pd.read_csv(path_str, encoding='utf-8-sig', usecols=usecols, engine='pyarrow')
+    
+    # 書き込み途中のファイルを読まないよう、一時ファイルに書き込んでから置き換える
+    temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        FEATHER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for stale_path in FEATHER_CACHE_DIR.glob(f"{path_key}-*.feather"):
+            stale_path.unlink(missing_ok=True)
+        df.to_feather(temp_path)
+        os.replace(temp_path, cache_path)
+        _trim_feather_cache(cache_path)
+    except Exception as e:
+        temp_path.unlink(missing_ok=True)
+        logging.getLogger(__name__).debug(f"Featherキャッシュを保存できませんでした: {e}")
+    
+    return df
+
+
+def _trim_feather_cache(keep_path: Path) -> None:
+    """Featherキャッシュの合計サイズが上限を超えた場合、更新日時の古いファイルから削除（keep_pathは残す）"""
+    cache_files = []
+    for cache_file in FEATHER_CACHE_DIR.glob('*.feather'):
+        try:
+            stat = cache_file.stat()
+        except OSError:
+            continue  # 他のプロセスが削除したファイル
+        cache_files.append((stat.st_mtime_ns, stat.st_size, cache_file))
+    
+    total_size = 0
+    for _, size, cache_file in sorted(cache_files, reverse=True):
+        total_size += size
+        if total_size > FEATHER_CACHE_MAX_BYTES and cache_file != keep_path:
+            cache_file.unlink(missing_ok=True)
+
+
+def _iter_monthly_sales_chunks(path_str: str, mtime_ns: int, usecols: Optional[List[str]]) -> Iterator[pd.DataFrame]:
+    """月別売上CSVを分割して読み込み（pyarrowエンジンは分割読み込みに対応しないため一括で読み込む）"""
+    if PYARROW_AVAILABLE:
+        yield _read_csv_with_feather_cache(path_str, mtime_ns, usecols)
+    else:
+        # ファイルはメモリマップで読み込み、列の型は分割単位ごとに一度だけ推定する
+        yield from pd.read_csv(
+            path_str, encoding='utf-8-sig', usecols=usecols, chunksize=MONTHLY_SALES_CHUNK_SIZE,
+            memory_map=True, low_memory=False
+        )
+
+
+@functools.lru_cache(maxsize=8)
+def _read_monthly_sales_cached(path_str: str, mtime_ns: int, months: Tuple[str, ...]) -> Dict[Optional[str], pd.DataFrame]:
+    """月別売上CSVから指定年月の行だけを年月ごとに取得（年月列がない場合はキーNoneに全データ。返すDataFrameは共有される）"""
+    # 必要な列のみを読み込む（該当する列がない場合は全列を読み込む）
+    header = pd.read_csv(path_str, encoding='utf-8-sig', nrows=0).columns
+    usecols = [column for column in header if column in MONTHLY_SALES_COLUMNS] or None
+    month_column = next((column for column in MONTHLY_SALES_MONTH_COLUMNS if column in header), None)
+    
+    if month_column is None:
+        return {None: pd.concat(list(_iter_monthly_sales_chunks(path_str, mtime_ns, usecols)), ignore_index=True)}
+    
+    # 年月列が整数として読み込まれた場合に比較する値（文字列表現が一致するものだけ）
+    int_months = [int(month) for month in months if month.isdigit() and str(int(month)) == month]
+    
+    # 分割して読み込みながら対象年月の行だけを残す（年月列は文字列として扱う）
+    pieces = []
+    for chunk in _iter_monthly_sales_chunks(path_str, mtime_ns, usecols):
+        chunk_months = chunk[month_column]
+        if pd.api.types.is_integer_dtype(chunk_months):
+            # 整数列は全行を文字列化せずに整数のまま比較する
+            mask = np.isin(chunk_months.to_numpy(), int_months)
+        else:
+            mask = chunk_months.astype(str).isin(months).to_numpy()
+        # 文字列への変換は一致した行に対してのみ行う
+        pieces.append(chunk[mask].assign(**{month_column: chunk_months[mask].astype(str)}))
+    
+    matched_df = pd.concat(pieces, ignore_index=True) if pieces else pd.DataFrame(columns=usecols or header)
+    return {month: matched_df[matched_df[month_column] == month] for month in months}
+
+
+def _column_values(df: pd.DataFrame, column: str, default='') -> list:
+    """列の値をリストで取得（列がない場合は全行default）"""
+    return df[column].tolist() if column in df.columns else [default] * len(df)
+
+
+def _content_platform_keys(df: pd.DataFrame) -> Optional[List[str]]:
+    """各行の「コンテンツ名_プラットフォーム名」キーを作成（対応する列の組がない場合はNone）"""
+    for content_column, platform_column in (('コンテンツ', 'プラットフォーム'), ('コンテンツ名', 'ISP')):
+        if content_column in df.columns and platform_column in df.columns:
+            return [
+                f"{content}_{platform}"
+                for content, platform in zip(df[content_column].tolist(), df[platform_column].tolist())
+            ]
+    return None
+
+
+def _is_plain_uncased(pattern: str) -> bool:
+    """正規表現の特殊文字を含まず、大文字・小文字の区別がある文字も含まない文字列か（日本語のコンテンツ名など）"""
+    return re.escape(pattern) == pattern and pattern.lower() == pattern.upper()
+
+
+class _CategoricalColumn(NamedTuple):
+    """文字列列のカテゴリ表現（同じ値の比較・検索はカテゴリごとに一度だけ行う）"""
+    codes: np.ndarray       # 各行の値のcategories上の位置（欠損値は-1）
+    categories: np.ndarray  # 重複を除いた値
+    search_results: Dict[str, np.ndarray]  # 検索パターン -> searchの結果（呼び出し側で変更しないこと）
+    
+    @classmethod
+    def from_series(cls, series: pd.Series) -> '_CategoricalColumn':
+        """列の値からカテゴリ表現を作成"""
+        codes, categories = pd.factorize(series.to_numpy(dtype=object))
+        return cls(codes, np.asarray(categories, dtype=object), {})
+    
+    def map(self, func) -> '_CategoricalColumn':
+        """各カテゴリの値にfuncを適用したカテゴリ表現を作成"""
+        return _CategoricalColumn(self.codes, np.array([func(value) for value in self.categories], dtype=object), {})
+    
+    def values(self) -> np.ndarray:
+        """各行の値を取得（欠損値はNone）"""
+        return np.append(self.categories, None)[self.codes]
+    
+    def search(self, pattern: str) -> np.ndarray:
+        """各行に対する部分一致判定（str.contains(pattern, case=False, na=False)と同じ正規表現検索）をbool配列で返す"""
+        # プラットフォーム名などは検索のたびに同じパターンになるため、結果をパターンごとに保持して再利用する
+        result = self.search_results.get(pattern)
+        if result is None:
+            if _is_plain_uncased(pattern):
+                # 正規表現の特殊文字も大文字小文字もないパターンは、単純な部分文字列検索と同じ結果になる
+                matched = np.fromiter((pattern in value for value in self.categories), dtype=bool, count=len(self.categories))
+            else:
+                search = re.compile(pattern, re.IGNORECASE).search
+                matched = np.fromiter((search(value) is not None for value in self.categories), dtype=bool, count=len(self.categories))
+            # 末尾のFalseは欠損値（-1）用
+            result = np.append(matched, False)[self.codes]
+            self.search_results[pattern] = result
+        return result
+
+
+class _SalesMatchIndex(NamedTuple):
+    """統合データの検索用索引"""
+    exact: Dict[Tuple[str, str], List[int]]   # (スペース正規化したコンテンツ名, 小文字のプラットフォーム名) -> 行位置リスト
+    contents: List[_CategoricalColumn]        # 前後の空白を除去したコンテンツ列
+    contents_no_space: List[_CategoricalColumn]  # さらに全角・半角スペースを除去したコンテンツ列
+    platforms: List[_CategoricalColumn]       # プラットフォーム列
 
 
 class SalesDataLoader:
@@ -19,29 +260,33 @@ class SalesDataLoader:
         """データローダーを初期化"""
         self.config = config_manager
         self.logger = logging.getLogger(__name__)
+        # (マッピングDataFrame, コンテンツ名 -> 該当行リスト) の組。同じマッピングに対しては索引を再利用する
+        self._template_index: Optional[Tuple[pd.DataFrame, Dict[str, List[tuple]]]] = None
+        # (コンテンツ名, プラットフォーム) -> テンプレートファイル一覧。マッピングの索引を作り直す際に破棄する
+        self._template_files_cache: Dict[Tuple[str, str], List[Tuple[str, str, List[str]]]] = {}
+        # (レートDataFrame, 名称 -> 該当行) の組。同じレートデータに対しては索引を再利用する
+        self._rate_index: Optional[Tuple[pd.DataFrame, Dict[str, tuple]]] = None
+        # id(統合データ) -> (統合データ, 検索用索引)。レコード生成のたびに作り直す
+        self._sales_match_indexes: Dict[int, Tuple[pd.DataFrame, _SalesMatchIndex]] = {}
     
-    def load_monthly_sales(self, target_month: str) -> pd.DataFrame:
-        """月別ISP別コンテンツ別売上.csvからデータを読み込み"""
+    def load_monthly_sales(self, target_month: str, prefetch_months: Iterable[str] = ()) -> pd.DataFrame:
+        """月別ISP別コンテンツ別売上.csvからデータを読み込み（prefetch_monthsの年月も同じ読み込みで取得しておく。戻り値は変更しないこと）"""
         file_path = self.config.get_monthly_sales_file()
         
-        if not Path(file_path).exists():
+        if not path_exists(file_path):
             raise FileNotFoundError(f"月別売上ファイルが見つかりません: {file_path}")
         
         try:
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
-            
-            # 対象年月でフィルタリング（文字列として比較）
-            if '年月' in df.columns:
-                # 年月列を文字列として扱い、文字列として比較
-                df['年月'] = df['年月'].astype(str)
-                filtered_df = df[df['年月'] == target_month].copy()
-            elif 'YYYYMM' in df.columns:
-                # YYYYMM列を文字列として扱い、文字列として比較
-                df['YYYYMM'] = df['YYYYMM'].astype(str)
-                filtered_df = df[df['YYYYMM'] == target_month].copy()
-            else:
+            # 対象年月でフィルタリングしながら読み込み（同じ処理で使う年月はまとめて1回で読み込む）
+            months = tuple(sorted({target_month, *prefetch_months}))
+            monthly_frames = _read_monthly_sales_cached(str(file_path), os.stat(file_path).st_mtime_ns, months)
+            
+            # 返すDataFrameはキャッシュと共有する（統合・検索処理は読み取りのみのためコピーしない）
+            if None in monthly_frames:
                 self.logger.warning("年月列が見つかりません。全データを返します。")
-                filtered_df = df.copy()
+                filtered_df = monthly_frames[None]
+            else:
+                filtered_df = monthly_frames[target_month]
             
             self.logger.info(f"月別売上データを読み込みました: {len(filtered_df)}件")
             return filtered_df
@@ -54,12 +299,12 @@ class SalesDataLoader:
         """LINE用line-contents-yyyy-mm.csvからデータを読み込み"""
         file_path = self.config.get_line_contents_file(year, month)
         
-        if not Path(file_path).exists():
+        if not path_exists(file_path):
             self.logger.warning(f"LINEコンテンツファイルが見つかりません: {file_path}")
             return pd.DataFrame()
         
         try:
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
+            df = _read_csv(file_path)
             self.logger.info(f"LINEコンテンツデータを読み込みました: {len(df)}件")
             return df
             
@@ -71,11 +316,11 @@ class SalesDataLoader:
         """contents_mapping.csvからデータを読み込み"""
         file_path = self.config.get_contents_mapping_file()
         
-        if not Path(file_path).exists():
+        if not path_exists(file_path):
             raise FileNotFoundError(f"コンテンツマッピングファイルが見つかりません: {file_path}")
         
         try:
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
+            df = _read_csv(file_path)
             self.logger.info(f"コンテンツマッピングデータを読み込みました: {len(df)}件")
             return df
             
@@ -87,11 +332,11 @@ class SalesDataLoader:
         """rate.csvからデータを読み込み"""
         file_path = self.config.get_rate_data_file()
         
-        if not Path(file_path).exists():
+        if not path_exists(file_path):
             raise FileNotFoundError(f"レートデータファイルが見つかりません: {file_path}")
         
         try:
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
+            df = _read_csv(file_path)
             self.logger.info(f"レートデータを読み込みました: {len(df)}件")
             return df
             
@@ -103,11 +348,11 @@ class SalesDataLoader:
         """target_month.csvからデータを読み込み"""
         file_path = Path(self.config.base_paths['current_dir']) / "target_month.csv"
         
-        if not file_path.exists():
+        if not path_exists(file_path):
             raise FileNotFoundError(f"target_month.csvファイルが見つかりません: {file_path}")
         
         try:
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
+            df = _read_csv(file_path)
             self.logger.info(f"target_monthデータを読み込みました: {len(df)}件")
             return df
             
@@ -124,32 +369,23 @@ class SalesDataLoader:
         try:
             # データ統合ロジックを実装
             # LINEデータを優先的に保持するため、まずLINEデータから開始
-            merged_df = line_data.copy()
+            # （統合データは読み取りのみのため、追加する行がない場合はコピーせずにそのまま返す）
+            merged_df = line_data
             
-            # 月別売上データから、LINEデータに存在しないものだけを追加
+            # 月別売上データから、LINEデータに存在しないものだけを追加（行の順序は保持）
             if not monthly_data.empty:
                 # LINEデータのコンテンツ名・プラットフォーム組み合わせを取得
-                line_keys = set()
-                if 'コンテンツ' in line_data.columns and 'プラットフォーム' in line_data.columns:
-                    for _, row in line_data.iterrows():
-                        key = f"{row.get('コンテンツ', '')}_{row.get('プラットフォーム', '')}"
-                        line_keys.add(key)
-                elif 'コンテンツ名' in line_data.columns and 'ISP' in line_data.columns:
-                    for _, row in line_data.iterrows():
-                        key = f"{row.get('コンテンツ名', '')}_{row.get('ISP', '')}"
-                        line_keys.add(key)
+                line_keys = set(_content_platform_keys(line_data) or ())
                 
                 # 月別売上データから重複しないものを追加
-                for _, row in monthly_data.iterrows():
-                    content_key = ""
-                    if 'コンテンツ' in monthly_data.columns and 'プラットフォーム' in monthly_data.columns:
-                        content_key = f"{row.get('コンテンツ', '')}_{row.get('プラットフォーム', '')}"
-                    elif 'コンテンツ名' in monthly_data.columns and 'ISP' in monthly_data.columns:
-                        content_key = f"{row.get('コンテンツ名', '')}_{row.get('ISP', '')}"
-                    
-                    if content_key not in line_keys:
-                        # LINEデータに存在しない場合のみ追加
-                        merged_df = pd.concat([merged_df, pd.DataFrame([row])], ignore_index=True)
+                monthly_keys = _content_platform_keys(monthly_data)
+                if monthly_keys is None:
+                    new_rows = monthly_data
+                else:
+                    new_rows = monthly_data[np.fromiter((key not in line_keys for key in monthly_keys), dtype=bool, count=len(monthly_keys))]
+                
+                if not new_rows.empty:
+                    merged_df = pd.concat([merged_df, new_rows], ignore_index=True)
             
             self.logger.info(f"データ統合完了: LINEデータ{len(line_data)}件 + 月別売上データ{len(monthly_data)}件 -> 統合後{len(merged_df)}件")
             return merged_df
@@ -158,8 +394,56 @@ class SalesDataLoader:
             self.logger.error(f"データ統合エラー: {e}")
             raise
     
+    def load_merged_sales_data(self, target_month: str, prefetch_months: Iterable[str] = ()) -> pd.DataFrame:
+        """対象年月の月別売上データとLINEデータを読み込んで統合"""
+        monthly_data = self.load_monthly_sales(target_month, prefetch_months)
+        line_data = self.load_line_contents(target_month[:4], target_month[4:])
+        merged_data = self.merge_sales_data(monthly_data, line_data)
+        
+        self.logger.debug("データ統合結果: %s件のデータ", len(merged_data))
+        # 一覧の抽出はDEBUG出力が有効な場合のみ行う
+        if not merged_data.empty and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"統合データの列: {list(merged_data.columns)}")
+            # プラットフォーム列の値を確認
+            if 'プラットフォーム' in merged_data.columns:
+                platforms = merged_data['プラットフォーム'].unique()
+                self.logger.debug(f"プラットフォーム一覧: {platforms}")
+            if 'コンテンツ' in merged_data.columns:
+                contents = merged_data['コンテンツ'].unique()
+                self.logger.debug(f"コンテンツ一覧: {contents[:10]}")  # 最初の10件のみ表示
+        
+        return merged_data
+    
+    def _preload_merged_sales_data(self, months: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        """複数の対象年月の統合データを並行して作成（読み込みに失敗した年月は含めない）"""
+        months = sorted(months)
+        if len(months) <= 1:
+            return {}
+        
+        try:
+            # 月別売上ファイルは全年月を1回で読み込むため、並行処理の前に読み込んでキャッシュしておく
+            self.load_monthly_sales(months[0], months)
+        except Exception:
+            return {}
+        
+        # 各年月のLINEファイル読み込みと統合は互いに独立しているためスレッドで並行実行
+        merged_data_by_month: Dict[str, pd.DataFrame] = {}
+        with ThreadPoolExecutor(max_workers=min(MONTH_LOAD_WORKERS, len(months))) as executor:
+            futures = {month: executor.submit(self.load_merged_sales_data, month, months) for month in months}
+            for month, future in futures.items():
+                try:
+                    merged_data_by_month[month] = future.result()
+                except Exception as e:
+                    self.logger.debug("統合データの事前読み込みに失敗しました: %s - %s", month, e)
+        
+        return merged_data_by_month
+    
     def create_sales_records(self, year: str, month: str, content_filter: str = None) -> List[SalesRecord]:
         """統合されたデータからSalesRecordリストを作成"""
+        return list(self.iter_sales_records(year, month, content_filter))
+    
+    def iter_sales_records(self, year: str, month: str, content_filter: str = None) -> Iterator[SalesRecord]:
+        """統合されたデータからSalesRecordを順次生成（マスタデータの読み込みは呼び出し時に行う）"""
         target_month = f"{year}{month.zfill(2)}"
         
         # 各データソースを読み込み
@@ -172,44 +456,65 @@ class SalesDataLoader:
             target_month_data = target_month_data[target_month_data.iloc[:, 0].astype(str) == content_filter]
             self.logger.info(f"コンテンツフィルター適用: {content_filter} - {len(target_month_data)}件に絞り込み")
         
-        sales_records = []
+        return self._generate_sales_records(target_month, target_month_data, content_mapping, rate_data)
+    
+    def _generate_sales_records(
+        self, target_month: str, target_month_data: pd.DataFrame, content_mapping: pd.DataFrame, rate_data: pd.DataFrame
+    ) -> Iterator[SalesRecord]:
+        """target_month.csvの各行に対応するSalesRecordを生成"""
+        record_count = 0
+        self._sales_match_indexes.clear()
+        
+        # 各行の実際の対象年月は事前にまとめて計算しておく
+        if '支払年月' in target_month_data.columns:
+            actual_target_months = self._calculate_offset_months(target_month, target_month_data['支払年月'])
+        else:
+            actual_target_months = [None] * len(target_month_data)
+        # 月別売上ファイルは今回使う年月をまとめて1回の読み込みで取得する
+        prefetch_months = {month for month in actual_target_months if month}
+        
+        # 支払年月のオフセットは数種類しかないため、統合データは対象年月ごとに一度だけ作成する
+        # （事前に読み込めなかった年月は、該当行の処理時に読み込みを再試行してエラーを記録する）
+        merged_data_by_month = self._preload_merged_sales_data(prefetch_months)
+        
+        # target_month.csvの各行について処理（行ごとのSeries・タプル生成を避けるため列ごとのリストをまとめて走査）
+        rows = zip(
+            _column_values(target_month_data, 'コンテンツ'),
+            _column_values(target_month_data, 'プラットフォーム'),
+            _column_values(target_month_data, '支払年月'),
+            actual_target_months,
+        )
         
-        # target_month.csvの各行について処理
-        for _, row in target_month_data.iterrows():
+        # 支払年月が空白の行は対象外（コンテンツ自体が存在しない）のため、ループの前にまとめて除外する
+        if '支払年月' in target_month_data.columns:
+            offsets = target_month_data['支払年月']
+            blank_offsets = (offsets.isna() | offsets.astype(str).str.strip().eq('')).to_numpy(dtype=bool)
+        else:
+            blank_offsets = np.ones(len(target_month_data), dtype=bool)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            rows = list(rows)
+            for (content_value, platform_value, _, _), is_blank in zip(rows, blank_offsets.tolist()):
+                if is_blank:
+                    self.logger.debug(f"支払年月が空白のため対象外（コンテンツ自体が存在しない）: {content_value} ({platform_value})")
+        rows = itertools.compress(rows, (~blank_offsets).tolist())
+        
+        for content_value, platform_value, offset_months, precomputed_month in rows:
             try:
-                content_name = str(row.get('コンテンツ', ''))
-                platform = str(row.get('プラットフォーム', ''))
-                offset_months = row.get('支払年月', '')
-                
-                # 支払年月が空白の場合は対象外（コンテンツ自体が存在しない）として処理をスキップ
-                if pd.isna(offset_months) or offset_months == '' or str(offset_months).strip() == '':
-                    self.logger.debug(f"支払年月が空白のため対象外（コンテンツ自体が存在しない）: {content_name} ({platform})")
-                    continue  # この行をスキップして次の行へ
-                else:
-                    offset_months = int(offset_months)
-                    # 対象年月からoffset_months分マイナスした年月を計算
-                    actual_target_month = self._calculate_offset_month(target_month, offset_months)
+                content_name = str(content_value)
+                # プラットフォーム名は全レコードで共有されるためインターンしておく
+                platform = sys.intern(str(platform_value))
                 
-                self.logger.debug(f"処理中: {content_name} ({platform}) - 対象年月: {actual_target_month} (オフセット: {offset_months})")
+                offset_months = int(offset_months)
+                # 対象年月からoffset_months分マイナスした年月（数値として事前計算できなかった値は個別に計算）
+                actual_target_month = precomputed_month or self._calculate_offset_month(target_month, offset_months)
                 
-                # 計算した年月のデータを読み込み
-                actual_year = actual_target_month[:4]
-                actual_month = actual_target_month[4:]
+                self.logger.debug("処理中: %s (%s) - 対象年月: %s (オフセット: %s)", content_name, platform, actual_target_month, offset_months)
                 
-                monthly_data = self.load_monthly_sales(actual_target_month)
-                line_data = self.load_line_contents(actual_year, actual_month)
-                merged_data = self.merge_sales_data(monthly_data, line_data)
-                
-                self.logger.debug(f"データ統合結果: {len(merged_data)}件のデータ")
-                if not merged_data.empty:
-                    self.logger.debug(f"統合データの列: {list(merged_data.columns)}")
-                    # プラットフォーム列の値を確認
-                    if 'プラットフォーム' in merged_data.columns:
-                        platforms = merged_data['プラットフォーム'].unique()
-                        self.logger.debug(f"プラットフォーム一覧: {platforms}")
-                    if 'コンテンツ' in merged_data.columns:
-                        contents = merged_data['コンテンツ'].unique()
-                        self.logger.debug(f"コンテンツ一覧: {contents[:10]}")  # 最初の10件のみ表示
+                # 計算した年月のデータを読み込み（同じ年月は統合済みデータを再利用）
+                merged_data = merged_data_by_month.get(actual_target_month)
+                if merged_data is None:
+                    merged_data = self.load_merged_sales_data(actual_target_month, prefetch_months)
+                    merged_data_by_month[actual_target_month] = merged_data
                 
                 # contents_mapping.csvから実際のコンテンツ名を取得してから検索
                 template_files = self._get_template_files_from_mapping(
@@ -218,22 +523,22 @@ class SalesDataLoader:
                 
                 matching_data = None
                 # 各テンプレートファイルに対応するコンテンツ名で検索
-                # C列に値がある場合は0円データも許可
-                allow_zero = not pd.isna(offset_months) and str(offset_months).strip() != ''
+                # C列に値がある場合は0円データも許可（支払年月が空白の行は除外済みのため常に許可）
+                allow_zero = True
                 
                 for template_file, output_content_name, search_candidates in template_files:
                     # miyoko-syufuのLINEプラットフォームの場合は特別処理（複数のコンテンツを合計）
                     if content_name == 'miyoko-syufu' and platform.lower() == 'line':
                         matching_data = self._find_and_aggregate_multiple_sales_data(merged_data, search_candidates, platform, allow_zero_performance=allow_zero)
                         if matching_data is not None:
-                            self.logger.debug(f"複数コンテンツ合計データを取得: {search_candidates}")
+                            self.logger.debug("複数コンテンツ合計データを取得: %s", search_candidates)
                             break
                     else:
                         # 通常の処理：複数の検索候補で売上データを検索
                         for search_content in search_candidates:
                             matching_data = self._find_matching_sales_data(merged_data, search_content, platform, allow_zero_performance=allow_zero)
                             if matching_data is not None:
-                                self.logger.debug(f"マッチしたコンテンツ名: {search_content}")
+                                self.logger.debug("マッチしたコンテンツ名: %s", search_content)
                                 break
                         if matching_data is not None:
                             break
@@ -255,7 +560,11 @@ class SalesDataLoader:
                         sales_count = 0
                         if platform.lower() in ['ameba', 'mediba', 'rakuten']:
                             sales_count = int(matching_data.get('売上件数', 0))
-                            self.logger.debug(f"売上件数取得: {output_content_name} ({platform}) - 件数: {sales_count}")
+                            self.logger.debug("売上件数取得: %s (%s) - 件数: %s", output_content_name, platform, sales_count)
+                        
+                        # 実績・情報提供料は宛先によらず共通のため、宛先ごとのループの外で一度だけ取り出す
+                        performance = float(matching_data.get('実績', 0))
+                        information_fee = float(matching_data.get('情報提供料', 0))
                         
                         # 各メールアドレスに対してSalesRecordを作成
                         for email_address in rate_info['email_addresses']:
@@ -263,8 +572,8 @@ class SalesDataLoader:
                             record = SalesRecord(
                                 platform=platform,
                                 content_name=output_content_name,  # 出力用コンテンツ名を使用（D列優先）
-                                performance=float(matching_data.get('実績', 0)),
-                                information_fee=float(matching_data.get('情報提供料', 0)),
+                                performance=performance,
+                                information_fee=information_fee,
                                 target_month=actual_target_month,  # 計算された実際の対象年月
                                 template_file=template_file,
                                 rate=rate_info['rate'],
@@ -273,86 +582,92 @@ class SalesDataLoader:
                             )
                             
                             # デバッグ情報を追加
-                            self.logger.debug(f"SalesRecord作成: {output_content_name} ({platform}) - 宛先:{email_address}, 実績:{record.performance}, 情報提供料:{record.information_fee}, テンプレート:{template_file}")
+                            self.logger.debug("SalesRecord作成: %s (%s) - 宛先:%s, 実績:%s, 情報提供料:%s, テンプレート:%s", output_content_name, platform, email_address, record.performance, record.information_fee, template_file)
                             
-                            sales_records.append(record)
+                            record_count += 1
+                            yield record
                 else:
                     # データが見つからない場合、C列（支払年月）に値があるかチェック
                     # C列に値がある場合は売上0円でも記載する
                     self.logger.warning(f"該当データが見つかりませんでした: {content_name} ({platform}) - 対象年月: {actual_target_month}")
                     
-                    # C列に値がある（支払年月が指定されている）場合は0円で記載
-                    if not pd.isna(offset_months) and str(offset_months).strip() != '':
-                        self.logger.info(f"支払年月が指定されているため0円で記載: {content_name} ({platform})")
+                    # C列に値がある（支払年月が指定されている）場合は0円で記載（空白の行は除外済み）
+                    self.logger.info(f"支払年月が指定されているため0円で記載: {content_name} ({platform})")
+                    
+                    # 各テンプレートファイルに対してSalesRecordを作成（実績0円）
+                    for template_file, output_content_name, search_candidates in template_files:
+                        # output_content_nameが空文字の場合はそのプラットフォームでコンテンツが存在しないためスキップ
+                        if not output_content_name or output_content_name.strip() == '':
+                            self.logger.info(f"コンテンツ名が空文字のためスキップ: {content_name} ({platform})")
+                            continue
+                            
+                        # レートデータから料率とメールアドレスリストを取得
+                        rate_info = self._get_rate_info(template_file, rate_data)
                         
-                        # 各テンプレートファイルに対してSalesRecordを作成（実績0円）
-                        for template_file, output_content_name, search_candidates in template_files:
-                            # output_content_nameが空文字の場合はそのプラットフォームでコンテンツが存在しないためスキップ
-                            if not output_content_name or output_content_name.strip() == '':
-                                self.logger.info(f"コンテンツ名が空文字のためスキップ: {content_name} ({platform})")
-                                continue
-                                
-                            # レートデータから料率とメールアドレスリストを取得
-                            rate_info = self._get_rate_info(template_file, rate_data)
+                        # 各メールアドレスに対してSalesRecordを作成（0円データ）
+                        for email_address in rate_info['email_addresses']:
+                            # SalesRecordを作成（実績・情報提供料ともに0、出力用コンテンツ名を使用）
+                            record = SalesRecord(
+                                platform=platform,
+                                content_name=output_content_name,  # 出力用コンテンツ名を使用（D列優先）
+                                performance=0.0,  # 実績0円
+                                information_fee=0.0,  # 情報提供料0円
+                                target_month=actual_target_month,  # 計算された実際の対象年月
+                                template_file=template_file,
+                                rate=rate_info['rate'],
+                                recipient_email=email_address,  # 個別のメールアドレスを設定
+                                sales_count=0  # 0円の場合は件数も0
+                            )
                             
-                            # 各メールアドレスに対してSalesRecordを作成（0円データ）
-                            for email_address in rate_info['email_addresses']:
-                                # SalesRecordを作成（実績・情報提供料ともに0、出力用コンテンツ名を使用）
-                                record = SalesRecord(
-                                    platform=platform,
-                                    content_name=output_content_name,  # 出力用コンテンツ名を使用（D列優先）
-                                    performance=0.0,  # 実績0円
-                                    information_fee=0.0,  # 情報提供料0円
-                                    target_month=actual_target_month,  # 計算された実際の対象年月
-                                    template_file=template_file,
-                                    rate=rate_info['rate'],
-                                    recipient_email=email_address,  # 個別のメールアドレスを設定
-                                    sales_count=0  # 0円の場合は件数も0
-                                )
-                                
-                                # デバッグ情報を追加
-                                self.logger.debug(f"SalesRecord作成(0円): {output_content_name} ({platform}) - 宛先:{email_address}, 実績:0, 情報提供料:0, テンプレート:{template_file}")
-                                
-                                sales_records.append(record)
-                
+                            # デバッグ情報を追加
+                            self.logger.debug("SalesRecord作成(0円): %s (%s) - 宛先:%s, 実績:0, 情報提供料:0, テンプレート:%s", output_content_name, platform, email_address, template_file)
+                            
+                            record_count += 1
+                            yield record
+            
             except Exception as e:
                 self.logger.warning(f"レコード作成エラー (コンテンツ: {content_name}, プラットフォーム: {platform}): {e}")
                 continue
         
-        self.logger.info(f"SalesRecord作成完了: {len(sales_records)}件")
-        return sales_records
+        self.logger.info(f"SalesRecord作成完了: {record_count}件")
     
     def _get_template_files_from_mapping(
         self, content_name: str, platform: str, mapping_df: pd.DataFrame
     ) -> List[Tuple[str, str]]:
-        """コンテンツマッピングからテンプレートファイル名と実際のコンテンツ名のリストを取得"""
+        """コンテンツマッピングからテンプレートファイル名と実際のコンテンツ名のリストを取得（解決済みの組み合わせは結果を再利用。戻り値は変更しないこと）"""
+        # 索引の取得時にマッピングが変わっていれば解決済みの結果も破棄される
+        self._get_template_index(mapping_df)
+        
+        key = (content_name, platform)
+        templates = self._template_files_cache.get(key)
+        if templates is None:
+            templates = self._resolve_template_files(content_name, platform, mapping_df)
+            self._template_files_cache[key] = templates
+        return templates
+    
+    def _resolve_template_files(
+        self, content_name: str, platform: str, mapping_df: pd.DataFrame
+    ) -> List[Tuple[str, str]]:
+        """コンテンツマッピングの該当行からテンプレートファイル名・出力用コンテンツ名・検索候補を決定"""
         try:
-            # プラットフォーム別の列名マッピング
-            platform_column_map = {
-                'mediba': 'mediba',  # medibaは独立したプラットフォーム
-                'line': 'LINE', 
-                'satori': 'ameba',  # satoriプラットフォームはameba列を参照
-                'ameba': 'ameba',   # amebaプラットフォームはameba列を参照
-                'rakuten': '楽天',  # rakutenは楽天列を使用
-                '楽天': '楽天',
-                'excite': 'excite'
-            }
-            
             # プラットフォームに対応する列名を取得
-            target_column = platform_column_map.get(platform.lower(), platform)
+            target_column = PLATFORM_COLUMN_MAP.get(platform.lower(), platform)
             
             if target_column not in mapping_df.columns:
                 self.logger.warning(f"プラットフォーム列が見つかりません: {target_column}")
                 return [("default_template.xlsx", content_name)]
             
-            # コンテンツ名で検索
-            for _, row in mapping_df.iterrows():
+            # 列名は重複や記号を含むことがあるため、プラットフォーム列は位置で参照する
+            target_index = mapping_df.columns.get_loc(target_column)
+            
+            # コンテンツ名で検索（A列・B列の値から作成した索引で該当行のみを取得）
+            for row in self._get_template_index(mapping_df).get(content_name, ()):
                 # A列（テンプレートファイル名）とB列でも検索
-                row_content_name_a = str(row.iloc[0])  # A列のコンテンツ名
-                row_content_name_b = str(row.iloc[1]) if len(row) > 1 and pd.notna(row.iloc[1]) else None  # B列のコンテンツ名
-                platform_content = str(row.get(target_column, ''))  # プラットフォーム列の値
+                row_content_name_a = str(row[0])  # A列のコンテンツ名
+                row_content_name_b = str(row[1]) if len(row) > 1 and pd.notna(row[1]) else None  # B列のコンテンツ名
+                platform_content = str(row[target_index])  # プラットフォーム列の値
                 
-                self.logger.debug(f"マッピング検索: {content_name} ({platform}) vs A列='{row_content_name_a}', B列='{row_content_name_b}', {target_column}列='{platform_content}'")
+                self.logger.debug("マッピング検索: %s (%s) vs A列='%s', B列='%s', %s列='%s'", content_name, platform, row_content_name_a, row_content_name_b, target_column, platform_content)
                 
                 # A列またはB列のコンテンツ名と一致するかチェック
                 if row_content_name_a == content_name or (row_content_name_b and row_content_name_b == content_name):
@@ -363,12 +678,12 @@ class SalesDataLoader:
                         # D列（4列目）のコンテンツ名を取得
                         mediba_d_content = ''
                         if len(row) > 3:
-                            mediba_d_content = str(row.iloc[3])  # D列
+                            mediba_d_content = str(row[3])  # D列
                         
                         # C列（3列目）のコンテンツ名を取得
                         mediba_c_content = ''
                         if len(row) > 2:
-                            mediba_c_content = str(row.iloc[2])  # C列
+                            mediba_c_content = str(row[2])  # C列
                         
                         # 出力用にはD列を優先、D列が空ならC列を使用
                         output_content = ''
@@ -388,19 +703,19 @@ class SalesDataLoader:
                         if not search_candidates:
                             search_candidates.append('')  # medibaで両方の列が空の場合は空文字で検索（マッチしない）
                             
-                        self.logger.debug(f"mediba マッピング一致: {content_name} -> output_content='{output_content}', search_candidates={search_candidates}")
+                        self.logger.debug("mediba マッピング一致: %s -> output_content='%s', search_candidates=%s", content_name, output_content, search_candidates)
                         
                         # 出力用コンテンツ名で1つだけテンプレートを作成
                         # A列のテンプレートファイル
-                        template_a = str(row.iloc[0])
+                        template_a = str(row[0])
                         if template_a and template_a != '' and not pd.isna(template_a):
-                            template_file_a = template_a + '.xlsx' if not template_a.endswith(('.xlsx', '.xls')) else template_a
+                            template_file_a = _excel_file_name(template_a)
                             templates.append((template_file_a, output_content, search_candidates))
                         
                         # B列のテンプレートファイル（存在する場合）
-                        if len(row) > 1 and pd.notna(row.iloc[1]) and str(row.iloc[1]) != '':
-                            template_b = str(row.iloc[1])
-                            template_file_b = template_b + '.xlsx' if not template_b.endswith(('.xlsx', '.xls')) else template_b
+                        if len(row) > 1 and pd.notna(row[1]) and str(row[1]) != '':
+                            template_b = str(row[1])
+                            template_file_b = _excel_file_name(template_b)
                             templates.append((template_file_b, output_content, search_candidates))
                     else:
                         # mediba以外のプラットフォームの場合
@@ -433,18 +748,18 @@ class SalesDataLoader:
                         if not search_candidates:
                             search_candidates = [content_name]
                         
-                        self.logger.debug(f"マッピング一致: {content_name} -> actual_content_name='{actual_content_name}', search_candidates={search_candidates}")
+                        self.logger.debug("マッピング一致: %s -> actual_content_name='%s', search_candidates=%s", content_name, actual_content_name, search_candidates)
                         
                         # A列のテンプレートファイル
-                        template_a = str(row.iloc[0])
+                        template_a = str(row[0])
                         if template_a and template_a != '' and not pd.isna(template_a):
-                            template_file_a = template_a + '.xlsx' if not template_a.endswith(('.xlsx', '.xls')) else template_a
+                            template_file_a = _excel_file_name(template_a)
                             templates.append((template_file_a, actual_content_name, search_candidates))
                         
                         # B列のテンプレートファイル（存在する場合）
-                        if len(row) > 1 and pd.notna(row.iloc[1]) and str(row.iloc[1]) != '':
-                            template_b = str(row.iloc[1])
-                            template_file_b = template_b + '.xlsx' if not template_b.endswith(('.xlsx', '.xls')) else template_b
+                        if len(row) > 1 and pd.notna(row[1]) and str(row[1]) != '':
+                            template_b = str(row[1])
+                            template_file_b = _excel_file_name(template_b)
                             templates.append((template_file_b, actual_content_name, search_candidates))
                     
                     if templates:
@@ -459,18 +774,44 @@ class SalesDataLoader:
             self.logger.error(f"テンプレートファイル取得エラー: {e}")
             return [("default_template.xlsx", content_name, [content_name])]
     
+    def _get_template_index(self, mapping_df: pd.DataFrame) -> Dict[str, List[tuple]]:
+        """コンテンツマッピングの索引を取得（同じマッピングに対しては作成済みの索引を再利用）"""
+        if self._template_index is None or self._template_index[0] is not mapping_df:
+            self._template_index = (mapping_df, self._build_template_index(mapping_df))
+            self._template_files_cache.clear()
+        return self._template_index[1]
+    
+    def _build_template_index(self, mapping_df: pd.DataFrame) -> Dict[str, List[tuple]]:
+        """A列・B列のコンテンツ名から該当行（ファイル内の順序を保持）を引く索引を作成"""
+        index: Dict[str, List[tuple]] = {}
+        for row in mapping_df.itertuples(index=False, name=None):
+            names = [str(row[0])]  # A列のコンテンツ名
+            if len(row) > 1 and pd.notna(row[1]) and str(row[1]) and str(row[1]) != names[0]:
+                names.append(str(row[1]))  # B列のコンテンツ名
+            for name in names:
+                index.setdefault(name, []).append(row)
+        return index
+    
+    def _get_rate_index(self, rate_df: pd.DataFrame) -> Dict[str, tuple]:
+        """レートデータの名称から行を引く索引を取得（同じ名称が複数ある場合は最初の行）"""
+        if self._rate_index is None or self._rate_index[0] is not rate_df:
+            names = rate_df['名称'].tolist()
+            index: Dict[str, tuple] = {}
+            for name, row in zip(names, rate_df.itertuples(index=False, name=None)):
+                index.setdefault(name, row)
+            self._rate_index = (rate_df, index)
+        return self._rate_index[1]
+    
     def _get_rate_info(self, template_file: str, rate_df: pd.DataFrame) -> Dict[str, any]:
         """レートデータから料率とメールアドレスリストを取得"""
         try:
             # テンプレートファイル名（拡張子なし）で検索
-            template_name = Path(template_file).stem
+            template_name = _template_stem(template_file)
             
-            mask = rate_df['名称'] == template_name
-            matched_rows = rate_df[mask]
+            row = self._get_rate_index(rate_df).get(template_name)
             
-            if not matched_rows.empty:
-                row = matched_rows.iloc[0]
-                rate_value = row.get('料率（％）', 0.0)
+            if row is not None:
+                rate_value = row[rate_df.columns.get_loc('料率（％）')] if '料率（％）' in rate_df.columns else 0.0
                 
                 # 料率を小数に変換（例：8% -> 0.08）
                 rate = float(rate_value) / 100.0 if rate_value else 0.0
@@ -479,20 +820,19 @@ class SalesDataLoader:
                 email_addresses = []
                 # D列以降の列をチェック（インデックス3以降）
                 for col_idx in range(3, len(row)):
-                    if col_idx < len(rate_df.columns):
-                        col_name = rate_df.columns[col_idx]
-                        email_value = row.iloc[col_idx]
-                        
-                        # 空でないメールアドレスを追加
-                        if pd.notna(email_value) and str(email_value).strip() != '':
-                            email_addr = str(email_value).strip()
-                            if email_addr:  # 空文字でない場合のみ追加
-                                email_addresses.append(email_addr)
-                                self.logger.debug(f"メールアドレス取得: {template_name} - {col_name}: {email_addr}")
+                    col_name = rate_df.columns[col_idx]
+                    email_value = row[col_idx]
+                    
+                    # 空でないメールアドレスを追加
+                    if pd.notna(email_value) and str(email_value).strip() != '':
+                        email_addr = str(email_value).strip()
+                        if email_addr:  # 空文字でない場合のみ追加
+                            email_addresses.append(email_addr)
+                            self.logger.debug("メールアドレス取得: %s - %s: %s", template_name, col_name, email_addr)
                 
                 # メールアドレスが見つからない場合はデフォルト値
                 if not email_addresses:
-                    email_addresses = ['mizoguchi@outward.jp']
+                    email_addresses = [DEFAULT_RECIPIENT_EMAIL]
                     self.logger.warning(f"メールアドレスが見つからないためデフォルト値を使用: {template_name}")
                 
                 self.logger.info(f"レート情報取得: {template_name} - 料率: {rate*100:.1f}%, メール: {email_addresses}")
@@ -504,11 +844,11 @@ class SalesDataLoader:
             
             # マッチしない場合はデフォルト値
             self.logger.warning(f"レート情報が見つかりません: {template_file}")
-            return {'rate': 0.0, 'email_addresses': ['mizoguchi@outward.jp']}
+            return {'rate': 0.0, 'email_addresses': [DEFAULT_RECIPIENT_EMAIL]}
             
         except Exception as e:
             self.logger.error(f"レート情報取得エラー: {e}")
-            return {'rate': 0.0, 'email_addresses': ['mizoguchi@outward.jp']}
+            return {'rate': 0.0, 'email_addresses': [DEFAULT_RECIPIENT_EMAIL]}
     
     def _calculate_offset_month(self, target_month: str, offset_months: int) -> str:
         """対象年月からoffset_months分マイナスした年月を計算"""
@@ -517,12 +857,12 @@ class SalesDataLoader:
             month = int(target_month[4:])
             
             # デバッグ情報を追加
-            self.logger.debug(f"年月計算開始: target_month={target_month}, year={year}, month={month}, offset_months={offset_months}")
+            self.logger.debug("年月計算開始: target_month=%s, year=%s, month=%s, offset_months=%s", target_month, year, month, offset_months)
             
             # マイナス月数を加算（負の値なのでマイナスになる）
             total_months = (year * 12 + month - 1) + offset_months
             
-            self.logger.debug(f"計算過程: ({year} * 12 + {month} - 1) + {offset_months} = {total_months}")
+            self.logger.debug("計算過程: (%s * 12 + %s - 1) + %s = %s", year, month, offset_months, total_months)
             
             if total_months < 0:
                 self.logger.warning(f"計算結果が負の値になりました: {target_month} + {offset_months}")
@@ -531,10 +871,10 @@ class SalesDataLoader:
             result_year = total_months // 12
             result_month = (total_months % 12) + 1
             
-            self.logger.debug(f"結果計算: result_year={result_year}, result_month={result_month}")
+            self.logger.debug("結果計算: result_year=%s, result_month=%s", result_year, result_month)
             
             result = f"{result_year}{result_month:02d}"
-            self.logger.debug(f"年月計算: {target_month} + {offset_months}ヶ月 = {result}")
+            self.logger.debug("年月計算: %s + %sヶ月 = %s", target_month, offset_months, result)
             
             return result
             
@@ -542,6 +882,33 @@ class SalesDataLoader:
             self.logger.error(f"年月計算エラー: {e}")
             return target_month
     
+    def _calculate_offset_months(self, target_month: str, offsets: pd.Series) -> List[Optional[str]]:
+        """支払年月の列から各行の対象年月をまとめて計算（数値でない行はNone）"""
+        year = int(target_month[:4])
+        month = int(target_month[4:])
+        
+        # int()と同じく小数部は0方向に切り捨てる
+        offset_values = np.trunc(pd.to_numeric(offsets, errors='coerce').to_numpy(dtype=float, na_value=np.nan))
+        valid = ~np.isnan(offset_values)
+        total_months = (year * 12 + month - 1) + np.where(valid, offset_values, 0).astype(np.int64)
+        
+        # 書式化は出現する月数ごとに一度だけ行う
+        formatted: Dict[int, str] = {}
+        for total in np.unique(total_months[valid]).tolist():
+            if total < 0:
+                self.logger.warning(f"計算結果が負の値になりました: {target_month} + {total - (year * 12 + month - 1)}")
+                formatted[total] = target_month  # デフォルトで元の年月を返す
+            else:
+                formatted[total] = f"{total // 12}{total % 12 + 1:02d}"
+        
+        actual_target_months = [
+            formatted[total] if is_valid else None
+            for total, is_valid in zip(total_months.tolist(), valid.tolist())
+        ]
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"対象年月の内訳: {dict(Counter(month for month in actual_target_months if month))}")
+        return actual_target_months
+    
     def _find_and_aggregate_multiple_sales_data(self, merged_data: pd.DataFrame, content_names: List[str], platform: str, allow_zero_performance: bool = False) -> Optional[pd.Series]:
         """複数のコンテンツ名の売上データを検索して合計"""
         try:
@@ -560,7 +927,7 @@ class SalesDataLoader:
                     aggregated_data['実績'] += float(matching_data.get('実績', 0))
                     aggregated_data['情報提供料'] += float(matching_data.get('情報提供料', 0))
                     aggregated_data['売上件数'] += int(matching_data.get('売上件数', 0))
-                    self.logger.debug(f"合計処理: {content_name} - 実績:{matching_data.get('実績', 0)}, 情報提供料:{matching_data.get('情報提供料', 0)}")
+                    self.logger.debug("合計処理: %s - 実績:%s, 情報提供料:%s", content_name, matching_data.get('実績', 0), matching_data.get('情報提供料', 0))
             
             if found_any:
                 # pd.Seriesとして返す（元のデータと同じ形式）
@@ -574,19 +941,70 @@ class SalesDataLoader:
             self.logger.error(f"複数コンテンツ売上データ合計エラー: {e}")
             return None
 
+    def _get_sales_match_index(self, merged_data: pd.DataFrame) -> _SalesMatchIndex:
+        """統合データの検索用索引を取得（同じ統合データに対しては作成済みの索引を再利用）"""
+        cached = self._sales_match_indexes.get(id(merged_data))
+        if cached is None or cached[0] is not merged_data:
+            cached = (merged_data, self._build_sales_match_index(merged_data))
+            self._sales_match_indexes[id(merged_data)] = cached
+        return cached[1]
+    
+    def _build_sales_match_index(self, merged_data: pd.DataFrame) -> _SalesMatchIndex:
+        """統合データの検索用索引を作成（文字列列はカテゴリ表現にして値ごとの処理を一度にする）"""
+        # データ側は前後の空白文字、改行文字を除去して正規化
+        contents = [
+            _CategoricalColumn.from_series(merged_data[column].astype(str).str.strip())
+            for column in ('コンテンツ', 'コンテンツ名') if column in merged_data.columns
+        ]
+        platforms = [
+            _CategoricalColumn.from_series(merged_data[column].astype(str))
+            for column in ('プラットフォーム', 'ISP') if column in merged_data.columns
+        ]
+        
+        # 完全一致用：全角スペースを半角に正規化したコンテンツ名と小文字のプラットフォーム名の組み合わせ
+        normalized_contents = [column.map(lambda value: value.translate(SPACE_NORMALIZE_TABLE)).values() for column in contents]
+        lowered_platforms = [column.map(str.lower).values() for column in platforms]
+        
+        exact: Dict[Tuple[str, str], List[int]] = {}
+        for position, (row_contents, row_platforms) in enumerate(zip(zip(*normalized_contents), zip(*lowered_platforms))):
+            # コンテンツ列・プラットフォーム列のいずれかの組み合わせで一致すれば該当行とする（欠損値は一致させない）
+            keys = {
+                (content, platform_name)
+                for content in row_contents if content is not None
+                for platform_name in row_platforms if platform_name is not None
+            }
+            for key in keys:
+                exact.setdefault(key, []).append(position)
+        
+        contents_no_space = [column.map(lambda value: value.translate(SPACE_REMOVE_TABLE)) for column in contents]
+        return _SalesMatchIndex(exact, contents, contents_no_space, platforms)
+    
+    def _select_matching_row(
+        self, merged_data: pd.DataFrame, positions: np.ndarray, allow_zero_performance: bool,
+        match_label: str, content_name: str, platform: str
+    ) -> Optional[pd.Series]:
+        """一致した行（昇順の行位置）から返す行を選択（実績が0より大きい行を優先）"""
+        valid_positions = positions[(merged_data['実績'].iloc[positions] > 0).to_numpy()]
+        if len(valid_positions):
+            return merged_data.iloc[valid_positions[0]]
+        elif allow_zero_performance:
+            # 0円データも許可する場合は最初の行を返す
+            self.logger.debug("%sで実績0のデータを返します: %s, %s", match_label, content_name, platform)
+            return merged_data.iloc[positions[0]]
+        else:
+            self.logger.debug("%sしたが実績が0のデータのみ: %s, %s", match_label, content_name, platform)
+            return None
+    
     def _find_matching_sales_data(self, merged_data: pd.DataFrame, content_name: str, platform: str, allow_zero_performance: bool = False) -> Optional[pd.Series]:
         """統合データから該当するコンテンツとプラットフォームのデータを検索"""
         try:
             if merged_data.empty:
-                self.logger.debug(f"統合データが空です: {content_name}, {platform}")
+                self.logger.debug("統合データが空です: %s, %s", content_name, platform)
                 return None
             
-            # インデックスをリセットしてDataFrameを正規化
-            merged_data = merged_data.reset_index(drop=True)
-            
-            # デバッグ用：統合データの内容を表示
-            self.logger.debug(f"統合データ検索: コンテンツ='{content_name}', プラットフォーム='{platform}', データ件数={len(merged_data)}")
-            if not merged_data.empty:
+            # デバッグ用：統合データの内容を表示（DEBUG出力が無効な場合は抽出処理自体を省略）
+            self.logger.debug("統合データ検索: コンテンツ='%s', プラットフォーム='%s', データ件数=%s", content_name, platform, len(merged_data))
+            if self.logger.isEnabledFor(logging.DEBUG):
                 self.logger.debug(f"統合データの列: {list(merged_data.columns)}")
                 # exciteデータのみを表示
                 if 'プラットフォーム' in merged_data.columns:
@@ -597,165 +1015,83 @@ class SalesDataLoader:
                             content_col = row.get('コンテンツ', row.get('コンテンツ名', 'N/A'))
                             self.logger.debug(f"  {idx}: コンテンツ='{content_col}', プラットフォーム='{row.get('プラットフォーム', 'N/A')}', 実績={row.get('実績', 'N/A')}")
             
-            # プラットフォーム名の正規化マッピング
-            platform_mapping = {
-                'ameba': ['ameba', 'satori'],  # amebaはsatoriデータも含む
-                'satori': ['ameba', 'satori'], 
-                'mediba': ['mediba'],  # medibaは独立したプラットフォーム
-                'line': ['line'],
-                'rakuten': ['rakuten', '楽天'],
-                '楽天': ['rakuten', '楽天'],
-                'excite': ['excite']
-            }
-            
             # 検索対象のプラットフォーム名リストを取得
-            search_platforms = platform_mapping.get(platform.lower(), [platform])
-            self.logger.debug(f"検索対象プラットフォーム: {search_platforms}")
-            
-            # コンテンツ名での検索（完全一致、スペース正規化対応）
-            content_mask = pd.Series([False] * len(merged_data), index=merged_data.index)
+            search_platforms = SEARCH_PLATFORM_MAP.get(platform.lower(), (platform,))
+            self.logger.debug("検索対象プラットフォーム: %s", search_platforms)
             
             # 検索対象コンテンツ名を正規化（前後の空白文字、改行文字を除去）
             clean_content_name = content_name.strip()
             
-            # スペース文字を正規化した検索名を作成
-            normalized_content_name = clean_content_name.replace('　', ' ').replace(' ', ' ')
-            
-            if 'コンテンツ' in merged_data.columns:
-                # データ側も正規化（前後の空白文字、改行文字を除去）
-                clean_data = merged_data['コンテンツ'].astype(str).str.strip()
-                
-                # 完全一致
-                exact_match = (clean_data == clean_content_name)
-                content_mask |= exact_match
-                self.logger.debug(f"コンテンツ列完全一致: '{clean_content_name}' -> {exact_match.sum()}件")
-                
-                # スペース正規化での一致
-                normalized_data = clean_data.str.replace('　', ' ').str.replace(' ', ' ')
-                normalized_match = (normalized_data == normalized_content_name)
-                content_mask |= normalized_match
-                self.logger.debug(f"コンテンツ列正規化一致: '{normalized_content_name}' -> {normalized_match.sum()}件")
-                
-            if 'コンテンツ名' in merged_data.columns:
-                # データ側も正規化（前後の空白文字、改行文字を除去）
-                clean_data = merged_data['コンテンツ名'].astype(str).str.strip()
-                
-                # 完全一致
-                exact_match = (clean_data == clean_content_name)
-                content_mask |= exact_match
-                self.logger.debug(f"コンテンツ名列完全一致: '{clean_content_name}' -> {exact_match.sum()}件")
-                
-                # スペース正規化での一致
-                normalized_data = clean_data.str.replace('　', ' ').str.replace(' ', ' ')
-                normalized_match = (normalized_data == normalized_content_name)
-                content_mask |= normalized_match
-                self.logger.debug(f"コンテンツ名列正規化一致: '{normalized_content_name}' -> {normalized_match.sum()}件")
-            
-            self.logger.debug(f"コンテンツ検索結果: 合計{content_mask.sum()}件マッチ")
+            # スペース文字を正規化した検索名を作成（完全一致する値は正規化後も一致するため、正規化後の比較のみで判定できる）
+            normalized_content_name = clean_content_name.translate(SPACE_NORMALIZE_TABLE)
             
-            # プラットフォーム名での検索（完全一致）
-            platform_mask = pd.Series([False] * len(merged_data), index=merged_data.index)
+            # コンテンツ名・プラットフォーム名の完全一致は、統合データごとに作成した索引から該当行を取得
+            match_index = self._get_sales_match_index(merged_data)
+            exact_positions = sorted(set().union(*(
+                match_index.exact.get((normalized_content_name, search_platform.lower()), ())
+                for search_platform in search_platforms
+            )))
+            self.logger.debug("最終的な結合結果: %s件マッチ", len(exact_positions))
             
-            for search_platform in search_platforms:
-                if 'プラットフォーム' in merged_data.columns:
-                    platform_match = (merged_data['プラットフォーム'].astype(str).str.lower() == search_platform.lower())
-                    platform_mask |= platform_match
-                    self.logger.debug(f"プラットフォーム列一致 '{search_platform}': {platform_match.sum()}件")
-                if 'ISP' in merged_data.columns:
-                    isp_match = (merged_data['ISP'].astype(str).str.lower() == search_platform.lower())
-                    platform_mask |= isp_match
-                    self.logger.debug(f"ISP列一致 '{search_platform}': {isp_match.sum()}件")
-            
-            self.logger.debug(f"プラットフォーム検索結果: 合計{platform_mask.sum()}件マッチ")
-            
-            # 両方の条件を満たすデータを検索
-            matching_rows = merged_data[content_mask & platform_mask]
-            self.logger.debug(f"最終的な結合結果: {len(matching_rows)}件マッチ")
-            
-            if not matching_rows.empty:
-                self.logger.debug(f"完全一致でデータが見つかりました: {content_name}, {platform}")
-                # 実績が0より大きいレコードを優先的に返す
-                valid_rows = matching_rows[matching_rows['実績'] > 0]
-                if not valid_rows.empty:
-                    return valid_rows.iloc[0]
-                elif allow_zero_performance:
-                    # 0円データも許可する場合は最初の行を返す
-                    self.logger.debug(f"完全一致で実績0のデータを返します: {content_name}, {platform}")
-                    return matching_rows.iloc[0]
-                else:
-                    self.logger.debug(f"完全一致したが実績が0のデータのみ: {content_name}, {platform}")
-                    return None
+            if exact_positions:
+                self.logger.debug("完全一致でデータが見つかりました: %s, %s", content_name, platform)
+                # 索引から得た行位置のみを調べる（全行分のマスクは作成しない）
+                return self._select_matching_row(
+                    merged_data, np.array(exact_positions), allow_zero_performance, "完全一致", content_name, platform
+                )
             
-            # 完全一致しない場合は部分一致を試行
-            content_partial_mask = pd.Series([False] * len(merged_data), index=merged_data.index)
+            # 完全一致しない場合は部分一致を試行（大文字小文字を区別しない正規表現検索、索引のカテゴリごとに判定）
+            content_partial_mask = np.zeros(len(merged_data), dtype=bool)
             
             # スペース除去版も作成
-            content_name_no_space = clean_content_name.replace('　', '').replace(' ', '')
+            content_name_no_space = clean_content_name.translate(SPACE_REMOVE_TABLE)
             
-            if 'コンテンツ' in merged_data.columns:
-                clean_data = merged_data['コンテンツ'].astype(str).str.strip()
-                content_partial_mask |= clean_data.str.contains(clean_content_name, na=False, case=False)
-                content_partial_mask |= clean_data.str.contains(content_name_no_space, na=False, case=False)
-                # 全角・半角スペースを除去したデータでも検索
-                no_space_data = clean_data.str.replace('　', '').str.replace(' ', '')
-                content_partial_mask |= no_space_data.str.contains(content_name_no_space, na=False, case=False)
-            if 'コンテンツ名' in merged_data.columns:
-                clean_data = merged_data['コンテンツ名'].astype(str).str.strip()
-                content_partial_mask |= clean_data.str.contains(clean_content_name, na=False, case=False)
-                content_partial_mask |= clean_data.str.contains(content_name_no_space, na=False, case=False)
+            for column, no_space_column in zip(match_index.contents, match_index.contents_no_space):
+                content_partial_mask |= column.search(clean_content_name)
+                content_partial_mask |= column.search(content_name_no_space)
                 # 全角・半角スペースを除去したデータでも検索
-                no_space_data = clean_data.str.replace('　', '').str.replace(' ', '')
-                content_partial_mask |= no_space_data.str.contains(content_name_no_space, na=False, case=False)
+                content_partial_mask |= no_space_column.search(content_name_no_space)
             
-            platform_partial_mask = pd.Series([False] * len(merged_data), index=merged_data.index)
+            platform_partial_mask = np.zeros(len(merged_data), dtype=bool)
             
-            for search_platform in search_platforms:
-                if 'プラットフォーム' in merged_data.columns:
-                    platform_partial_mask |= merged_data['プラットフォーム'].astype(str).str.contains(search_platform, na=False, case=False)
-                if 'ISP' in merged_data.columns:
-                    platform_partial_mask |= merged_data['ISP'].astype(str).str.contains(search_platform, na=False, case=False)
-            
-            partial_matching = merged_data[content_partial_mask & platform_partial_mask]
-            
-            if not partial_matching.empty:
-                self.logger.debug(f"部分一致でデータが見つかりました: {content_name}, {platform}")
-                # 実績が0より大きいレコードを優先的に返す
-                valid_rows = partial_matching[partial_matching['実績'] > 0]
-                if not valid_rows.empty:
-                    return valid_rows.iloc[0]
-                elif allow_zero_performance:
-                    # 0円データも許可する場合は最初の行を返す
-                    self.logger.debug(f"部分一致で実績0のデータを返します: {content_name}, {platform}")
-                    return partial_matching.iloc[0]
-                else:
-                    self.logger.debug(f"部分一致したが実績が0のデータのみ: {content_name}, {platform}")
-                    return None
+            for column in match_index.platforms:
+                for search_platform in search_platforms:
+                    platform_partial_mask |= column.search(search_platform)
+            
+            partial_mask = content_partial_mask & platform_partial_mask
+            
+            if partial_mask.any():
+                self.logger.debug("部分一致でデータが見つかりました: %s, %s", content_name, platform)
+                return self._select_matching_row(
+                    merged_data, np.flatnonzero(partial_mask), allow_zero_performance, "部分一致", content_name, platform
+                )
             
             # プラットフォームのみの検索は行わない
             # コンテンツ名が一致しない場合は検索結果なしとする
             # これにより異なるプラットフォームのコンテンツ名が誤って表示されることを防ぐ
             
-            self.logger.debug(f"該当データが見つかりませんでした: {content_name}, {platform}")
-            self.logger.debug(f"利用可能な列: {list(merged_data.columns)}")
-            
-            # 詳細なデバッグ情報を追加
-            if platform.lower() == 'excite' and 'シェイプシフター' in content_name:
-                self.logger.debug("=== 詳細デバッグ：excite シェイプシフター検索 ===")
-                if 'コンテンツ' in merged_data.columns:
-                    unique_contents = merged_data['コンテンツ'].unique()
-                    self.logger.debug(f"利用可能なコンテンツ名（最初の10件）: {unique_contents[:10]}")
-                    # シェイプシフターが含まれるコンテンツを検索
-                    shape_contents = [c for c in unique_contents if 'シェイプシフター' in str(c)]
-                    self.logger.debug(f"シェイプシフターを含むコンテンツ: {shape_contents}")
-                if 'プラットフォーム' in merged_data.columns:
-                    unique_platforms = merged_data['プラットフォーム'].unique()
-                    self.logger.debug(f"利用可能なプラットフォーム: {unique_platforms}")
-                    excite_rows = merged_data[merged_data['プラットフォーム'].astype(str).str.lower() == 'excite']
-                    self.logger.debug(f"exciteプラットフォームのデータ: {len(excite_rows)}件")
-                    if not excite_rows.empty:
-                        excite_contents = excite_rows['コンテンツ'].unique() if 'コンテンツ' in excite_rows.columns else []
-                        self.logger.debug(f"exciteのコンテンツ: {excite_contents}")
-                self.logger.debug("=== 詳細デバッグ終了 ===")
+            self.logger.debug("該当データが見つかりませんでした: %s, %s", content_name, platform)
+            
+            # 詳細なデバッグ情報を追加（DEBUG出力が無効な場合は一覧の抽出自体を省略）
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"利用可能な列: {list(merged_data.columns)}")
+                if platform.lower() == 'excite' and 'シェイプシフター' in content_name:
+                    self.logger.debug("=== 詳細デバッグ：excite シェイプシフター検索 ===")
+                    if 'コンテンツ' in merged_data.columns:
+                        unique_contents = merged_data['コンテンツ'].unique()
+                        self.logger.debug(f"利用可能なコンテンツ名（最初の10件）: {unique_contents[:10]}")
+                        # シェイプシフターが含まれるコンテンツを検索
+                        shape_contents = [c for c in unique_contents if 'シェイプシフター' in str(c)]
+                        self.logger.debug(f"シェイプシフターを含むコンテンツ: {shape_contents}")
+                    if 'プラットフォーム' in merged_data.columns:
+                        unique_platforms = merged_data['プラットフォーム'].unique()
+                        self.logger.debug(f"利用可能なプラットフォーム: {unique_platforms}")
+                        excite_rows = merged_data[merged_data['プラットフォーム'].astype(str).str.lower() == 'excite']
+                        self.logger.debug(f"exciteプラットフォームのデータ: {len(excite_rows)}件")
+                        if not excite_rows.empty:
+                            excite_contents = excite_rows['コンテンツ'].unique() if 'コンテンツ' in excite_rows.columns else []
+                            self.logger.debug(f"exciteのコンテンツ: {excite_contents}")
+                    self.logger.debug("=== 詳細デバッグ終了 ===")
             
             return None
             
@@ -4,65 +4,67 @@
 AE19セルの問題をデバッグするためのスクリプト
 """
 
-import openpyxl
 import glob
+import io
 import os
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl.utils import get_column_letter
+
+from xlsx_cell_reader import read_sheet_cells
 
 def debug_xlsx_file(file_path):
     """xlsxファイルのセル内容をデバッグ"""
     print(f"=== {os.path.basename(file_path)} の分析 ===")
     
     try:
-        # 数式ブックと計算値ブックの両方を読み込み
-        workbook_formula = openpyxl.load_workbook(file_path, data_only=False)
-        workbook_data = openpyxl.load_workbook(file_path, data_only=True)
-        
-        worksheet_formula = workbook_formula.active
-        worksheet_data = workbook_data.active
+        # 19行目のM～AE列とAE1～AE60の数式・計算値をシートの1回の走査でまとめて読み込み
+        wanted = {f"{get_column_letter(col)}19" for col in range(13, 32)} | {f"AE{row}" for row in range(1, 61)}
+        sheet = read_sheet_cells(file_path, wanted)
         
-        print(f"シート名: {worksheet_formula.title}")
-        print(f"最大行: {worksheet_formula.max_row}, 最大列: {worksheet_formula.max_column}")
+        print(f"シート名: {sheet.title}")
+        print(f"最大行: {sheet.max_row}, 最大列: {sheet.max_column}")
         
         # AE19セルの詳細分析
-        ae19_formula = worksheet_formula.cell(row=19, column=31)
-        ae19_data = worksheet_data.cell(row=19, column=31)
+        ae19_formula, ae19_data = sheet.get("AE19")
         
         print(f"\nAE19セル分析:")
-        print(f"  数式: {ae19_formula.value}")
-        print(f"  データタイプ: {type(ae19_formula.value)}")
-        print(f"  計算値: {ae19_data.value}")
-        print(f"  計算値タイプ: {type(ae19_data.value)}")
+        print(f"  数式: {ae19_formula}")
+        print(f"  データタイプ: {type(ae19_formula)}")
+        print(f"  計算値: {ae19_data}")
+        print(f"  計算値タイプ: {type(ae19_data)}")
         
         # M19, S19, Y19セルの分析
         print(f"\n参照セル分析:")
-        for col_name, col_num in [("M", 13), ("S", 19), ("Y", 25)]:
-            cell_formula = worksheet_formula.cell(row=19, column=col_num)
-            cell_data = worksheet_data.cell(row=19, column=col_num)
-            print(f"  {col_name}19 - 数式: {cell_formula.value}, 計算値: {cell_data.value}")
+        for col_name in ("M", "S", "Y"):
+            cell_formula, cell_data = sheet.get(f"{col_name}19")
+            print(f"  {col_name}19 - 数式: {cell_formula}, 計算値: {cell_data}")
         
         # 19行目の周辺セルをチェック（M～Y列）
         print(f"\n19行目のM～Y列データ:")
         for col in range(13, 26):  # M列(13)からY列(25)まで
-            cell_formula = worksheet_formula.cell(row=19, column=col)
-            cell_data = worksheet_data.cell(row=19, column=col)
-            col_letter = openpyxl.utils.get_column_letter(col)
-            if cell_data.value not in [None, 0, ""]:
-                print(f"  {col_letter}19: 数式={cell_formula.value}, 値={cell_data.value}")
+            col_letter = get_column_letter(col)
+            cell_formula, cell_data = sheet.get(f"{col_letter}19")
+            if cell_data not in [None, 0, ""]:
+                print(f"  {col_letter}19: 数式={cell_formula}, 値={cell_data}")
         
         # 他の行で有効な値があるかチェック
         print(f"\nAE列の他の行（非0値のみ）:")
         for row in range(1, 61):  # 1-60行目
-            cell_data = worksheet_data.cell(row=row, column=31)  # AE列
-            if cell_data.value not in [None, 0, ""]:
-                cell_formula = worksheet_formula.cell(row=row, column=31)
-                print(f"  AE{row}: 数式={cell_formula.value}, 値={cell_data.value}")
-        
-        workbook_formula.close()
-        workbook_data.close()
+            cell_formula, cell_data = sheet.get(f"AE{row}")  # AE列
+            if cell_data not in [None, 0, ""]:
+                print(f"  AE{row}: 数式={cell_formula}, 値={cell_data}")
         
     except Exception as e:
         print(f"エラー: {e}")
 
+def _debug_xlsx_file_output(file_path):
+    """別プロセスでdebug_xlsx_fileを実行し、出力内容を返す（出力はメインプロセスでファイル順に表示）"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        debug_xlsx_file(file_path)
+    return buffer.getvalue()
+
 def main():
     # テスト用に1つのファイルを分析
     royalty_dir = r"C:\Users\OW\Dropbox\disk2とローカルの同期\占い\占い売上\履歴\ロイヤリティ"
@@ -72,13 +74,13 @@ def main():
     if os.path.exists(test_folder):
         xlsx_files = glob.glob(os.path.join(test_folder, "*.xlsx"))
         if xlsx_files:
-            # 最初のファイルをテスト
-            debug_xlsx_file(xlsx_files[0])
-            
-            # 複数ファイルもテスト
-            if len(xlsx_files) > 1:
-                print(f"\n" + "="*50)
-                debug_xlsx_file(xlsx_files[1])
+            # 最初のファイルと、複数ファイルがあれば2つ目のファイルもテスト（並行して分析）
+            test_files = xlsx_files[:2]
+            with ProcessPoolExecutor(max_workers=min(len(test_files), os.cpu_count() or 1)) as executor:
+                for index, output in enumerate(executor.map(_debug_xlsx_file_output, test_files)):
+                    if index:
+                        print(f"\n" + "="*50)
+                    print(output, end='')
         else:
             print("No xlsx files found")
     else:
@@ -5,15 +5,18 @@ aoki、aquaの売上計算をデバッグするスクリプト
 """
 
 import os
+import io
+import contextlib
 import pandas as pd
 import glob
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-import openpyxl
-import openpyxl.utils
 from pathlib import Path
 import re
 import csv
 
+from xlsx_cell_reader import read_sheet_cells
+
 def load_rate_data():
     """rate.csvを読み込み"""
     rate_csv_path = r"C:\Users\OW\pj\uriage\rate.csv"
@@ -32,47 +35,46 @@ def extract_name_from_filename(filename):
         return name_parts[0]
     return base_name
 
+# read_sales_from_xlsxで参照するセル（19行目の集計セルと、明細行23～58行目のY・AC・AE列）
+SALES_CELLS = frozenset(
+    ["AE19", "M19", "S19", "Y19"]
+    + [f"{col}{row}" for row in range(23, 59) for col in ("Y", "AC", "AE")]
+)
+
 def read_sales_from_xlsx(file_path):
     """xlsxファイルから売上データを読み取り（デバッグ用）"""
     try:
-        workbook_formula = openpyxl.load_workbook(file_path, data_only=False)
-        worksheet_formula = workbook_formula.active
-        
-        workbook_data = openpyxl.load_workbook(file_path, data_only=True)
-        worksheet_data = workbook_data.active
+        # 必要なセルの数式と計算値をシートの1回の走査でまとめて読み込み
+        sheet = read_sheet_cells(file_path, SALES_CELLS)
         
         # AE19セル（31列目、19行目）の処理
-        ae19_cell = worksheet_formula.cell(row=19, column=31)
-        ae19_value = worksheet_data.cell(row=19, column=31).value
+        ae19_formula, ae19_value = sheet.get("AE19")
         
-        print(f"  AE19セル - 数式: {ae19_cell.value}, 計算値: {ae19_value}")
+        print(f"  AE19セル - 数式: {ae19_formula}, 計算値: {ae19_value}")
         
         # M19の内容も確認
-        m19_cell = worksheet_formula.cell(row=19, column=13)
-        m19_value = worksheet_data.cell(row=19, column=13).value
-        print(f"  M19セル - 数式: {m19_cell.value}, 計算値: {m19_value}")
+        m19_formula, m19_value = sheet.get("M19")
+        print(f"  M19セル - 数式: {m19_formula}, 計算値: {m19_value}")
         
         # S19、Y19の内容も確認
-        s19_cell = worksheet_formula.cell(row=19, column=19)
-        s19_value = worksheet_data.cell(row=19, column=19).value
-        print(f"  S19セル - 数式: {s19_cell.value}, 計算値: {s19_value}")
+        s19_formula, s19_value = sheet.get("S19")
+        print(f"  S19セル - 数式: {s19_formula}, 計算値: {s19_value}")
         
-        y19_cell = worksheet_formula.cell(row=19, column=25)
-        y19_value = worksheet_data.cell(row=19, column=25).value
-        print(f"  Y19セル - 数式: {y19_cell.value}, 計算値: {y19_value}")
+        y19_formula, y19_value = sheet.get("Y19")
+        print(f"  Y19セル - 数式: {y19_formula}, 計算値: {y19_value}")
         
         # AE19が数式の場合の詳細処理
-        if ae19_cell.value and isinstance(ae19_cell.value, str) and ae19_cell.value.startswith('='):
-            print(f"  AE19は数式です: {ae19_cell.value}")
+        if ae19_formula and isinstance(ae19_formula, str) and ae19_formula.startswith('='):
+            print(f"  AE19は数式です: {ae19_formula}")
             
             # AE23:AE58の範囲を詳細に調査
             ae_sum = 0
             found_values = []
             
             for row in range(23, 59):
-                y_value = worksheet_data.cell(row=row, column=25).value  # Y列
-                ac_value = worksheet_data.cell(row=row, column=29).value  # AC列
-                ae_value = worksheet_data.cell(row=row, column=31).value  # AE列
+                y_value = sheet.get(f"Y{row}")[1]  # Y列
+                ac_value = sheet.get(f"AC{row}")[1]  # AC列
+                ae_value = sheet.get(f"AE{row}")[1]  # AE列
                 
                 if isinstance(y_value, (int, float)) and y_value > 0:
                     # 実際のAC値を使用
@@ -98,29 +100,27 @@ def read_sales_from_xlsx(file_path):
             if m19_value is not None:
                 calculated_final = m19_value - (s19_value or 0) + (y19_value or 0)
                 print(f"  最終計算値: M19({m19_value}) - S19({s19_value}) + Y19({y19_value}) = {calculated_final}")
-                
-                workbook_formula.close()
-                workbook_data.close()
                 return calculated_final
             elif ae19_value is not None:
-                workbook_formula.close()
-                workbook_data.close()
                 return ae19_value
         
         elif ae19_value is not None and isinstance(ae19_value, (int, float)):
             print(f"  AE19は直接値: {ae19_value}")
-            workbook_formula.close()
-            workbook_data.close()
             return ae19_value
         
-        workbook_formula.close()
-        workbook_data.close()
         return 0
         
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
         return 0
 
+def _read_sales_worker(file_path):
+    """別プロセスでread_sales_from_xlsxを実行し、(売上値, 出力内容)を返す（出力はメインプロセスでまとめて表示）"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        sales_value = read_sales_from_xlsx(file_path)
+    return sales_value, buffer.getvalue()
+
 def debug_specific_agents():
     """aoki、aquaの売上を詳細デバッグ"""
     royalty_dir = r"C:\Users\OW\Dropbox\disk2とローカルの同期\占い\占い売上\履歴\ロイヤリティ"
@@ -143,6 +143,8 @@ def debug_specific_agents():
         xlsx_files = glob.glob(os.path.join(folder_path, "*.xlsx"))
         print(f"Excelファイル数: {len(xlsx_files)}")
         
+        # 対象エージェントのファイルを先に選び出す
+        tasks = []
         for file_path in xlsx_files:
             filename = os.path.basename(file_path)
             name = extract_name_from_filename(filename)
@@ -152,9 +154,18 @@ def debug_specific_agents():
             if not matching_row.empty:
                 agent = matching_row.iloc[0]['エージェント']
                 if pd.notna(agent) and agent.strip() in target_agents:
-                    print(f"\n--- {filename} ({name} -> {agent}) ---")
-                    sales_value = read_sales_from_xlsx(file_path)
-                    print(f"最終売上値: {sales_value}")
+                    tasks.append((file_path, filename, name, agent))
+        
+        if not tasks:
+            continue
+        
+        # ファイルごとの読み取りは独立しているため複数プロセスで並行して実行し、結果はファイル順に表示
+        with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as executor:
+            results = executor.map(_read_sales_worker, [task[0] for task in tasks], chunksize=4)
+            for (file_path, filename, name, agent), (sales_value, output) in zip(tasks, results):
+                print(f"\n--- {filename} ({name} -> {agent}) ---")
+                print(output, end='')
+                print(f"最終売上値: {sales_value}")
 
 if __name__ == "__main__":
     debug_specific_agents()
\ No newline at end of file
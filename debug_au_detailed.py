@@ -3,10 +3,34 @@
 auファイルの詳細デバッグ
 """
 
+import codecs
 import pandas as pd
 import chardet
 from pathlib import Path
 
+# エンコーディング判定に使用するファイル先頭のバイト数
+PROBE_SIZE = 65536
+
+def detect_encoding(file_path):
+    """ファイル先頭のみでエンコーディングを判定（BOM → utf-8 → cp932 → chardetの順）"""
+    with open(file_path, 'rb') as f:
+        raw = f.read(PROBE_SIZE)
+    
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    
+    # 読み込み範囲の末尾で途切れた多バイト文字はエラーにしない
+    for encoding in ('utf-8', 'cp932'):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(raw, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    
+    return chardet.detect(raw[:8192])['encoding'] or 'cp932'
+
 def analyze_au_csv():
     test_file = Path(r"C:\Users\OW\Dropbox\disk2とローカルの同期\占い\占い売上\履歴\ISP支払通知書\2025\202503\au202503\202503cp02お支払い明細書.csv")
     
@@ -17,14 +41,12 @@ def analyze_au_csv():
         print("ファイルが存在しません")
         return
         
-    # エンコーディング検出
-    with open(test_file, 'rb') as f:
-        raw_data = f.read()
-        encoding_result = chardet.detect(raw_data)
-        print(f"検出されたエンコーディング: {encoding_result}")
+    # エンコーディング検出（ファイル全体ではなく先頭のみを調べる）
+    detected_encoding = detect_encoding(test_file)
+    print(f"検出されたエンコーディング: {detected_encoding}")
     
-    # 複数のエンコーディングで読み込み試行
-    encodings = ['utf-8', 'shift_jis', 'cp932', 'iso-2022-jp', 'euc-jp']
+    # 検出したエンコーディングから順に読み込み試行
+    encodings = list(dict.fromkeys([detected_encoding, 'utf-8', 'shift_jis', 'cp932', 'iso-2022-jp', 'euc-jp']))
     
     for encoding in encodings:
         try:
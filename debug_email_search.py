@@ -29,6 +29,30 @@ def decode_mime_header(header):
     ])
 
 
+# 一覧表示に使うヘッダーのみを取得する（本文・添付ファイルは転送しない。PEEKのため既読にもならない）
+HEADER_FETCH_ITEMS = '(BODY.PEEK[HEADER.FIELDS (FROM TO SUBJECT DATE)])'
+
+# 1回のFETCHで指定するメール数（コマンド行が長くなりすぎないように分割する）
+HEADER_FETCH_BATCH_SIZE = 500
+
+
+def fetch_headers(connection, email_ids):
+    """複数メールのヘッダーをまとめて取得（メールID -> ヘッダーのみのメッセージ）"""
+    headers = {}
+    for start in range(0, len(email_ids), HEADER_FETCH_BATCH_SIZE):
+        batch = email_ids[start:start + HEADER_FETCH_BATCH_SIZE]
+        typ, data = connection.fetch(b','.join(batch), HEADER_FETCH_ITEMS)
+        if typ != 'OK':
+            continue
+        
+        for part in data:
+            # 応答は (b'<ID> (BODY[HEADER.FIELDS (...)] {<サイズ>}', ヘッダー) のタプルと区切りのb')'が交互に並ぶ
+            if isinstance(part, tuple):
+                email_id = part[0].split(None, 1)[0]
+                headers[email_id] = email.message_from_bytes(part[1])
+    return headers
+
+
 def search_all_emails(email_processor, limit=20):
     """最新のメールを検索"""
     if not email_processor.connection:
@@ -48,14 +72,14 @@ def search_all_emails(email_processor, limit=20):
         # 最新のメールから取得
         recent_ids = email_ids[-limit:] if len(email_ids) > limit else email_ids
         
+        # 対象メールのヘッダーをまとめて取得
+        headers = fetch_headers(email_processor.connection, recent_ids)
+        
         emails = []
         for email_id in reversed(recent_ids):  # 新しい順
             try:
-                typ, msg_data = email_processor.connection.fetch(email_id, '(RFC822)')
-                if typ == 'OK':
-                    raw_email = msg_data[0][1]
-                    email_message = email.message_from_bytes(raw_email)
-                    
+                email_message = headers.get(email_id)
+                if email_message is not None:
                     emails.append({
                         'id': email_id.decode(),
                         'sender': decode_mime_header(email_message.get('From', '')),
@@ -87,15 +111,13 @@ def search_by_sender(email_processor, sender_pattern):
             return []
         
         email_ids = data[0].split()
+        headers = fetch_headers(email_processor.connection, email_ids)
         emails = []
         
         for email_id in email_ids:
             try:
-                typ, msg_data = email_processor.connection.fetch(email_id, '(RFC822)')
-                if typ == 'OK':
-                    raw_email = msg_data[0][1]
-                    email_message = email.message_from_bytes(raw_email)
-                    
+                email_message = headers.get(email_id)
+                if email_message is not None:
                     emails.append({
                         'id': email_id.decode(),
                         'sender': decode_mime_header(email_message.get('From', '')),
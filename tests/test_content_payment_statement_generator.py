@@ -0,0 +1,209 @@
+"""
+コンテンツ関連支払い明細書生成システムのテスト
+"""
+import unittest
+import tempfile
+import shutil
+import os
+from unittest import mock
+import pandas as pd
+from pathlib import Path
+import sys
+from datetime import datetime
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from content_payment_statement_generator import sales_data_loader
+from content_payment_statement_generator.sales_data_loader import SalesDataLoader
+from content_payment_statement_generator.data_models import PaymentStatement
+from content_payment_statement_generator.main_controller import _statement_output_suffixes
+
+
+class _LoaderConfig:
+    """テスト用ディレクトリを参照するSalesDataLoader用の設定"""
+
+    def __init__(self, base_dir: Path):
+        self.base_paths = {'sales_data': str(base_dir), 'current_dir': str(base_dir)}
+        self.files = {
+            'monthly_sales': 'monthly.csv',
+            'contents_mapping': 'contents_mapping.csv',
+            'rate_data': 'rate.csv'
+        }
+
+    def get_monthly_sales_file(self) -> str:
+        return str(Path(self.base_paths['sales_data']) / self.files['monthly_sales'])
+
+    def get_line_contents_file(self, year: str, month: str) -> str:
+        return str(Path(self.base_paths['sales_data']) / f"line-contents-{year}-{month.zfill(2)}.csv")
+
+    def get_contents_mapping_file(self) -> str:
+        return str(Path(self.base_paths['current_dir']) / self.files['contents_mapping'])
+
+    def get_rate_data_file(self) -> str:
+        return str(Path(self.base_paths['current_dir']) / self.files['rate_data'])
+
+
+class TestSalesDataLoader(unittest.TestCase):
+    """SalesDataLoaderのテスト"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+        pd.DataFrame({
+            '年月': [202411],
+            'プラットフォーム': ['ameba'],
+            'コンテンツ': ['alpha占い'],
+            '実績': [1000],
+            '情報提供料': [300],
+            '売上件数': [5],
+        }).to_csv(self.temp_dir / 'monthly.csv', index=False, encoding='utf-8-sig')
+
+        pd.DataFrame({
+            'コンテンツ': ['alpha', 'beta'],
+            'プラットフォーム': ['ameba', 'ameba'],
+            '支払年月': [0, 0],
+        }).to_csv(self.temp_dir / 'target_month.csv', index=False, encoding='utf-8-sig')
+
+        pd.DataFrame(
+            [['alpha', '', '', '', '', 'alpha占い'], ['beta', '', '', '', '', 'beta占い']],
+            columns=['ファイル名', 'ファイル名', 'mediba', 'mediba', 'LINE', 'ameba']
+        ).to_csv(self.temp_dir / 'contents_mapping.csv', index=False, encoding='utf-8-sig')
+
+        pd.DataFrame(
+            [['alpha', 'agent', 10, 'a1@example.com', 'a2@example.com'],
+             ['beta', 'agent', 8, 'b1@example.com', 'b2@example.com']],
+            columns=['名称', 'エージェント', '料率（％）', 'メールアドレス', 'メールアドレス']
+        ).to_csv(self.temp_dir / 'rate.csv', index=False, encoding='utf-8-sig')
+
+        self.loader = SalesDataLoader(_LoaderConfig(self.temp_dir))
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_zero_sales_content_yields_record_per_recipient(self):
+        """売上データがないコンテンツも宛先ごとに0円のレコードが作成されること"""
+        records = self.loader.create_sales_records('2024', '11')
+
+        beta_records = [r for r in records if r.content_name == 'beta占い']
+        self.assertEqual([r.recipient_email for r in beta_records], ['b1@example.com', 'b2@example.com'])
+        for record in beta_records:
+            self.assertEqual(record.performance, 0.0)
+            self.assertEqual(record.information_fee, 0.0)
+            self.assertEqual(record.target_month, '202411')
+
+    def test_matched_content_yields_record_per_recipient(self):
+        """売上データがあるコンテンツは宛先ごとに同じ実績のレコードが作成されること"""
+        records = self.loader.create_sales_records('2024', '11')
+
+        alpha_records = [r for r in records if r.content_name == 'alpha占い']
+        self.assertEqual([r.recipient_email for r in alpha_records], ['a1@example.com', 'a2@example.com'])
+        for record in alpha_records:
+            self.assertEqual(record.performance, 1000.0)
+            self.assertEqual(record.information_fee, 300.0)
+            self.assertEqual(record.sales_count, 5)
+            self.assertAlmostEqual(record.rate, 0.1)
+
+
+
+@unittest.skipUnless(sales_data_loader.PYARROW_AVAILABLE, "pyarrowがインストールされていません")
+class TestMonthlySalesReadPaths(unittest.TestCase):
+    """月別売上ファイルの読み込み経路（pyarrow / pandas）のテスト"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.csv_path = str(self.temp_dir / 'monthly.csv')
+        pd.DataFrame({
+            '年月': [202410, 202411, 202411, 202412],
+            'プラットフォーム': ['ameba', 'mediba', 'LINE', 'ameba'],
+            'コンテンツ': ['alpha占い', 'beta占い', 'gamma占い', 'alpha占い'],
+            '実績': [1000, 2000.5, 0, 4000],
+            '情報提供料': [300, 600, 0, 1200],
+            '売上件数': [5, None, 0, 20],
+            '備考': ['x', 'y', 'z', 'w'],
+        }).to_csv(self.csv_path, index=False, encoding='utf-8-sig')
+
+        # Featherキャッシュはテスト用ディレクトリに保存する
+        self.cache_dir = self.temp_dir / 'cache'
+        cache_dir_patcher = mock.patch.object(sales_data_loader, 'FEATHER_CACHE_DIR', self.cache_dir)
+        cache_dir_patcher.start()
+        self.addCleanup(cache_dir_patcher.stop)
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _read(self, use_pyarrow: bool):
+        read_monthly_sales = sales_data_loader._read_monthly_sales_cached.__wrapped__
+        with mock.patch.object(sales_data_loader, 'PYARROW_AVAILABLE', use_pyarrow):
+            return read_monthly_sales(self.csv_path, os.stat(self.csv_path).st_mtime_ns, ('202411', '202412'))
+
+    def test_pyarrow_path_matches_pandas_path(self):
+        """pyarrowでの読み込み結果がpandasでの読み込み結果と一致すること"""
+        expected = self._read(use_pyarrow=False)
+        actual = self._read(use_pyarrow=True)
+
+        self.assertEqual(list(actual), list(expected))
+        for month in expected:
+            pd.testing.assert_frame_equal(
+                actual[month].reset_index(drop=True), expected[month].reset_index(drop=True)
+            )
+        self.assertEqual(expected['202411']['コンテンツ'].tolist(), ['beta占い', 'gamma占い'])
+
+        # 2回目はFeatherキャッシュから読み込んでも同じ結果になること
+        self.assertEqual(len(list(self.cache_dir.glob('*.feather'))), 1)
+        cached = self._read(use_pyarrow=True)
+        for month in expected:
+            pd.testing.assert_frame_equal(
+                cached[month].reset_index(drop=True), expected[month].reset_index(drop=True)
+            )
+
+    def test_feather_cache_is_trimmed_to_size_limit(self):
+        """Featherキャッシュが上限サイズを超えた場合、古いファイルから削除されること"""
+        self.cache_dir.mkdir()
+        for i, name in enumerate(['old', 'middle', 'new']):
+            cache_file = self.cache_dir / f"{name}.feather"
+            cache_file.write_bytes(b'x' * 100)
+            os.utime(cache_file, ns=(i * 10**9, i * 10**9))
+
+        with mock.patch.object(sales_data_loader, 'FEATHER_CACHE_MAX_BYTES', 250):
+            sales_data_loader._trim_feather_cache(self.cache_dir / 'new.feather')
+
+        self.assertEqual(sorted(p.name for p in self.cache_dir.iterdir()), ['middle.feather', 'new.feather'])
+
+
+class TestStatementOutputSuffixes(unittest.TestCase):
+    """明細書の出力ファイル名の接尾辞のテスト"""
+
+    def _statement(self, template_file: str, recipient_email: str) -> PaymentStatement:
+        return PaymentStatement('content', template_file, [], 0.0, 0.0, datetime(2024, 12, 5), recipient_email)
+
+    def test_suffix_only_for_shared_output_name(self):
+        """同じテンプレートの明細書が複数ある場合のみ連番が付くこと"""
+        statements = {
+            ('aiga.xlsx', 'a@example.com'): self._statement('aiga.xlsx', 'a@example.com'),
+            ('aiga.xlsx', 'b@example.com'): self._statement('aiga.xlsx', 'b@example.com'),
+            ('gaia.xlsx', 'c@example.com'): self._statement('gaia.xlsx', 'c@example.com'),
+        }
+
+        self.assertEqual(_statement_output_suffixes(statements), {
+            ('aiga.xlsx', 'a@example.com'): '1',
+            ('aiga.xlsx', 'b@example.com'): '2',
+            ('gaia.xlsx', 'c@example.com'): None,
+        })
+
+    def test_content_name_shares_output_name(self):
+        """コンテンツ名指定時はテンプレートが異なっても連番が付くこと"""
+        statements = {
+            ('aiga.xlsx', 'a@example.com'): self._statement('aiga.xlsx', 'a@example.com'),
+            ('gaia.xlsx', 'c@example.com'): self._statement('gaia.xlsx', 'c@example.com'),
+        }
+
+        self.assertEqual(list(_statement_output_suffixes(statements, 'alpha').values()), ['1', '2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+xlsxセル読み取りモジュール
+
+openpyxlでブック全体を読み込まずに、アクティブシートのXMLを1回だけ走査して
+指定したセルの数式と計算値（Excelが保存時に書き込んだキャッシュ値）を取得します。
+日付書式のセルは日付に変換せず数値のまま返します。
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Container, Dict, List, NamedTuple, Optional, Tuple
+
+from openpyxl.formula.translate import Translator
+from openpyxl.utils import coordinate_to_tuple, range_boundaries
+
+try:
+    from lxml import etree as lxml_etree  # シートXMLの走査を高速化（タグで絞り込んで解析）
+except ImportError:
+    lxml_etree = None
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+XML_NS = {'m': NS_MAIN}
+
+TAG_CELL = f'{{{NS_MAIN}}}c'
+TAG_ROW = f'{{{NS_MAIN}}}row'
+TAG_FORMULA = f'{{{NS_MAIN}}}f'
+TAG_VALUE = f'{{{NS_MAIN}}}v'
+TAG_INLINE_STRING = f'{{{NS_MAIN}}}is'
+TAG_MERGE_CELL = f'{{{NS_MAIN}}}mergeCell'
+
+
+class SheetCells(NamedTuple):
+    """シートの読み取り結果（cellsはセル番地 -> (数式ブックでの値, 計算値)）"""
+    title: str
+    max_row: int
+    max_column: int
+    cells: Dict[str, Tuple[object, object]]
+
+    def get(self, coordinate: str) -> Tuple[object, object]:
+        """セルの(数式ブックでの値, 計算値)を取得（セルがない場合は(None, None)）"""
+        return self.cells.get(coordinate, (None, None))
+
+
+def _active_sheet(archive: zipfile.ZipFile) -> Tuple[str, str]:
+    """アクティブシートの(シート名, XMLパス)を取得"""
+    workbook_root = ET.fromstring(archive.read('xl/workbook.xml'))
+    workbook_view = workbook_root.find('m:bookViews/m:workbookView', XML_NS)
+    active_tab = int(workbook_view.get('activeTab', 0)) if workbook_view is not None else 0
+    sheet = workbook_root.findall('m:sheets/m:sheet', XML_NS)[active_tab]
+    rel_id = sheet.get(f'{{{NS_REL}}}id')
+
+    rels_root = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels_root.iterfind(f'{{{NS_PKG_REL}}}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            return sheet.get('name'), target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    raise KeyError(f"シートの参照が見つかりません: {rel_id}")
+
+
+def _read_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    """共有文字列テーブルを読み込み"""
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    root = ET.fromstring(archive.read('xl/sharedStrings.xml'))
+    return [''.join(si.itertext()) for si in root.iterfind('m:si', XML_NS)]
+
+
+def _cell_value(cell, text: Optional[str], shared_strings) -> object:
+    """セル要素の計算値をopenpyxlと同じ型で取得"""
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        inline = cell.find(TAG_INLINE_STRING)
+        return ''.join(inline.itertext()) if inline is not None else None
+    if text is None:
+        return None
+    if cell_type == 'n':
+        if not text:
+            return None  # 計算値が保存されていない数式セル
+        return float(text) if any(ch in text for ch in '.Ee') else int(text)
+    if cell_type == 's':
+        return shared_strings()[int(text)]
+    if cell_type == 'b':
+        return bool(int(text))
+    return text  # str（数式の文字列結果）、e（エラー値）、d（日付文字列）
+
+
+def _iter_sheet_elements(sheet_xml):
+    """シートXMLの行・セル・結合セル要素を終了タグの順に取得（lxmlがあればタグを絞り込んで解析）"""
+    if lxml_etree is not None:
+        for _, element in lxml_etree.iterparse(sheet_xml, tag=(TAG_ROW, TAG_CELL, TAG_MERGE_CELL)):
+            yield element
+    else:
+        for _, element in ET.iterparse(sheet_xml):
+            yield element
+
+
+def read_sheet_cells(file_path: str, wanted: Container[str]) -> SheetCells:
+    """アクティブシートを1回走査し、wantedに含まれるセル番地の数式と計算値を取得"""
+    with zipfile.ZipFile(file_path) as archive:
+        title, sheet_part = _active_sheet(archive)
+
+        # 共有文字列は文字列セルを読む場合のみ読み込む
+        shared_strings_cache = []
+
+        def shared_strings():
+            if not shared_strings_cache:
+                shared_strings_cache.append(_read_shared_strings(archive))
+            return shared_strings_cache[0]
+
+        cells: Dict[str, Tuple[object, object]] = {}
+        shared_formulas: Dict[str, Tuple[str, str]] = {}  # 共有数式ID -> (基準セル番地, 数式)
+        max_row = max_column = 0
+
+        with archive.open(sheet_part) as sheet_xml:
+            for element in _iter_sheet_elements(sheet_xml):
+                if element.tag == TAG_ROW:
+                    element.clear()  # 処理済みの行は保持しない
+                    continue
+                if element.tag == TAG_MERGE_CELL:
+                    # 結合セルの範囲も最大行・最大列に含める（openpyxlと同じ）
+                    _, _, max_merge_column, max_merge_row = range_boundaries(element.get('ref'))
+                    max_row = max(max_row, max_merge_row)
+                    max_column = max(max_column, max_merge_column)
+                    continue
+                if element.tag != TAG_CELL:
+                    continue
+
+                coordinate = element.get('r')
+                row, column = coordinate_to_tuple(coordinate)
+                max_row = max(max_row, row)
+                max_column = max(max_column, column)
+
+                # 共有数式は対象外のセルでも基準となる数式を記録しておく
+                formula = None
+                formula_element = element.find(TAG_FORMULA)
+                if formula_element is not None:
+                    shared_id = formula_element.get('si') if formula_element.get('t') == 'shared' else None
+                    if formula_element.text:
+                        formula = f"={formula_element.text}"
+                        if shared_id is not None:
+                            shared_formulas[shared_id] = (coordinate, formula)
+                    elif shared_id in shared_formulas:
+                        origin, origin_formula = shared_formulas[shared_id]
+                        formula = Translator(origin_formula, origin=origin).translate_formula(coordinate)
+
+                if coordinate in wanted:
+                    value = _cell_value(element, element.findtext(TAG_VALUE), shared_strings)
+                    cells[coordinate] = (formula if formula is not None else value, value)
+
+        return SheetCells(title, max_row, max_column, cells)